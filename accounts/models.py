@@ -20,6 +20,10 @@ DEFAULT_ALLOWED_TAGS = ['h3', 'p', 'a', 'abbr', 'cite', 'code',
                         'small', 'em', 'strong', 'sub', 'sup',
                         'u', 'ul', 'ol', 'li']
 
+NO_CREATE_SLUG_VALIDATOR = RegexValidator(regex="^create$",
+                                          message="The slug cannot be 'create'.",
+                                          inverse_match=True)
+
 
 class UserQuerySet(QuerySet):
     """A custom queryset for Users"""
@@ -109,9 +113,7 @@ class GroupDescription(models.Model):
     # This duplication makes class based views much easier to impliment.
     name = models.CharField(max_length=300, unique=True)
     slug = models.SlugField(max_length=300, unique=True,
-                            validators=[RegexValidator(regex="^create$",
-                                                       message="The slug cannot be 'create'.",
-                                                       inverse_match=True)],
+                            validators=[NO_CREATE_SLUG_VALIDATOR],
                             help_text='URL-safe identifier for the group.')
     description = BleachField(blank=True,
                               allowed_tags=DEFAULT_ALLOWED_TAGS,
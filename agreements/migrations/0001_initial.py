@@ -10,6 +10,13 @@ import django.utils.timezone
 import django_bleach.models
 import simple_history.models
 
+_BODY_HELP = 'HTML content of the agreement. The following tags are allowed: h3, p, a, abbr, cite, code, small, em, strong, sub, sup, u, ul, ol, li. Changing this field after the agreement has been signed by patrons is strongly discouraged.'
+_DESC_HELP = 'An HTML description of the resource. The following tags are allowed: h3, p, a, abbr, cite, code, small, em, strong, sub, sup, u, ul, ol, li.'
+_SLUG_MSG = "The slug cannot be 'create'."
+
+_SLUG_VALIDATOR = django.core.validators.RegexValidator(inverse_match=True, message=_SLUG_MSG, regex='^create$')
+_HTTPS_URL_VALIDATOR = django.core.validators.URLValidator(code='need_https', message="Enter a valid URL. It must start with 'https://'.", schemes=['https'])
+
 
 class Migration(migrations.Migration):
 
@@ -25,12 +32,12 @@ class Migration(migrations.Migration):
             fields=[
                 ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
                 ('title', models.CharField(max_length=300, unique=True)),
-                ('slug', models.SlugField(help_text='URL-safe identifier for the agreement.', max_length=300, unique=True, validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')])),
+                ('slug', models.SlugField(help_text='URL-safe identifier for the agreement.', max_length=300, unique=True, validators=[_SLUG_VALIDATOR])),
                 ('created', models.DateField(auto_now_add=True)),
                 ('start', models.DateTimeField(default=django.utils.timezone.now, help_text='The agreement is valid starting at this date and time. Format (UTC timezone): YYYY-MM-DD HH:MM:SS')),
                 ('end', models.DateTimeField(blank=True, default=agreements.models.date_121_days_from_now, help_text='The agreement is valid until this date and time. Format (UTC timezone): YYYY-MM-DD HH:MM:SS', null=True)),
-                ('body', django_bleach.models.BleachField(help_text='HTML content of the agreement. The following tags are allowed: h3, p, a, abbr, cite, code, small, em, strong, sub, sup, u, ul, ol, li. Changing this field after the agreement has been signed by patrons is strongly discouraged.')),
-                ('redirect_url', models.URLField(help_text="URL where patrons will be redirected to after signing the agreement. It must start with 'https://'.", validators=[django.core.validators.URLValidator(code='need_https', message="Enter a valid URL. It must start with 'https://'.", schemes=['https'])])),
+                ('body', django_bleach.models.BleachField(help_text=_BODY_HELP)),
+                ('redirect_url', models.URLField(help_text="URL where patrons will be redirected to after signing the agreement. It must start with 'https://'.", validators=[_HTTPS_URL_VALIDATOR])),
                 ('redirect_text', models.CharField(help_text='The text of the URL redirect link.', max_length=300)),
                 ('hidden', models.BooleanField(default=False, help_text='Hidden agreements do not appear in the list of active agreements.')),
             ],
@@ -43,7 +50,7 @@ class Migration(migrations.Migration):
             fields=[
                 ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
                 ('name', models.CharField(max_length=300)),
-                ('slug', models.SlugField(help_text='URL-safe identifier for the department.', max_length=300, unique=True, validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')])),
+                ('slug', models.SlugField(help_text='URL-safe identifier for the department.', max_length=300, unique=True, validators=[_SLUG_VALIDATOR])),
             ],
         ),
         migrations.CreateModel(
@@ -51,7 +58,7 @@ class Migration(migrations.Migration):
             fields=[
                 ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
                 ('name', models.CharField(max_length=300, unique=True)),
-                ('slug', models.SlugField(help_text='URL-safe identifier for the faculty.', max_length=300, unique=True, validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')])),
+                ('slug', models.SlugField(help_text='URL-safe identifier for the faculty.', max_length=300, unique=True, validators=[_SLUG_VALIDATOR])),
             ],
         ),
         migrations.CreateModel(
@@ -59,8 +66,8 @@ class Migration(migrations.Migration):
             fields=[
                 ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
                 ('name', models.CharField(max_length=300, unique=True)),
-                ('slug', models.SlugField(help_text='URL-safe identifier for the resource.', max_length=300, unique=True, validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')])),
-                ('description', django_bleach.models.BleachField(blank=True, help_text='An HTML description of the resource. The following tags are allowed: h3, p, a, abbr, cite, code, small, em, strong, sub, sup, u, ul, ol, li.')),
+                ('slug', models.SlugField(help_text='URL-safe identifier for the resource.', max_length=300, unique=True, validators=[_SLUG_VALIDATOR])),
+                ('description', django_bleach.models.BleachField(blank=True, help_text=_DESC_HELP)),
                 ('low_codes_threshold', models.PositiveSmallIntegerField(default=51, help_text='If the number of unassigned license codes associated with this resource falls below this threshold, start emailing warnings.')),
                 ('low_codes_email', models.CharField(blank=True, help_text='The recipient of email warnings about low numbers of remaning unassigned license codes.', max_length=200, validators=[django.core.validators.EmailValidator()])),
                 ('hidden', models.BooleanField(default=False, help_text='Hidden resources do not appear in the list of active resources.')),
@@ -123,8 +130,8 @@ class Migration(migrations.Migration):
             fields=[
                 ('id', models.IntegerField(auto_created=True, blank=True, db_index=True, verbose_name='ID')),
                 ('name', models.CharField(db_index=True, max_length=300)),
-                ('slug', models.SlugField(help_text='URL-safe identifier for the resource.', max_length=300, validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')])),
-                ('description', django_bleach.models.BleachField(blank=True, help_text='An HTML description of the resource. The following tags are allowed: h3, p, a, abbr, cite, code, small, em, strong, sub, sup, u, ul, ol, li.')),
+                ('slug', models.SlugField(help_text='URL-safe identifier for the resource.', max_length=300, validators=[_SLUG_VALIDATOR])),
+                ('description', django_bleach.models.BleachField(blank=True, help_text=_DESC_HELP)),
                 ('low_codes_threshold', models.PositiveSmallIntegerField(default=51, help_text='If the number of unassigned license codes associated with this resource falls below this threshold, start emailing warnings.')),
                 ('low_codes_email', models.CharField(blank=True, help_text='The recipient of email warnings about low numbers of remaning unassigned license codes.', max_length=200, validators=[django.core.validators.EmailValidator()])),
                 ('hidden', models.BooleanField(default=False, help_text='Hidden resources do not appear in the list of active resources.')),
@@ -167,7 +174,7 @@ class Migration(migrations.Migration):
             fields=[
                 ('id', models.IntegerField(auto_created=True, blank=True, db_index=True, verbose_name='ID')),
                 ('name', models.CharField(db_index=True, max_length=300)),
-                ('slug', models.SlugField(help_text='URL-safe identifier for the faculty.', max_length=300, validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')])),
+                ('slug', models.SlugField(help_text='URL-safe identifier for the faculty.', max_length=300, validators=[_SLUG_VALIDATOR])),
                 ('history_id', models.AutoField(primary_key=True, serialize=False)),
                 ('history_date', models.DateTimeField()),
                 ('history_change_reason', models.CharField(max_length=100, null=True)),
@@ -186,7 +193,7 @@ class Migration(migrations.Migration):
             fields=[
                 ('id', models.IntegerField(auto_created=True, blank=True, db_index=True, verbose_name='ID')),
                 ('name', models.CharField(max_length=300)),
-                ('slug', models.SlugField(help_text='URL-safe identifier for the department.', max_length=300, validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')])),
+                ('slug', models.SlugField(help_text='URL-safe identifier for the department.', max_length=300, validators=[_SLUG_VALIDATOR])),
                 ('history_id', models.AutoField(primary_key=True, serialize=False)),
                 ('history_date', models.DateTimeField()),
                 ('history_change_reason', models.CharField(max_length=100, null=True)),
@@ -206,12 +213,12 @@ class Migration(migrations.Migration):
             fields=[
                 ('id', models.IntegerField(auto_created=True, blank=True, db_index=True, verbose_name='ID')),
                 ('title', models.CharField(db_index=True, max_length=300)),
-                ('slug', models.SlugField(help_text='URL-safe identifier for the agreement.', max_length=300, validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')])),
+                ('slug', models.SlugField(help_text='URL-safe identifier for the agreement.', max_length=300, validators=[_SLUG_VALIDATOR])),
                 ('created', models.DateField(blank=True, editable=False)),
                 ('start', models.DateTimeField(default=django.utils.timezone.now, help_text='The agreement is valid starting at this date and time. Format (UTC timezone): YYYY-MM-DD HH:MM:SS')),
                 ('end', models.DateTimeField(blank=True, default=agreements.models.date_121_days_from_now, help_text='The agreement is valid until this date and time. Format (UTC timezone): YYYY-MM-DD HH:MM:SS', null=True)),
-                ('body', django_bleach.models.BleachField(help_text='HTML content of the agreement. The following tags are allowed: h3, p, a, abbr, cite, code, small, em, strong, sub, sup, u, ul, ol, li. Changing this field after the agreement has been signed by patrons is strongly discouraged.')),
-                ('redirect_url', models.URLField(help_text="URL where patrons will be redirected to after signing the agreement. It must start with 'https://'.", validators=[django.core.validators.URLValidator(code='need_https', message="Enter a valid URL. It must start with 'https://'.", schemes=['https'])])),
+                ('body', django_bleach.models.BleachField(help_text=_BODY_HELP)),
+                ('redirect_url', models.URLField(help_text="URL where patrons will be redirected to after signing the agreement. It must start with 'https://'.", validators=[_HTTPS_URL_VALIDATOR])),
                 ('redirect_text', models.CharField(help_text='The text of the URL redirect link.', max_length=300)),
                 ('hidden', models.BooleanField(default=False, help_text='Hidden agreements do not appear in the list of active agreements.')),
                 ('history_id', models.AutoField(primary_key=True, serialize=False)),
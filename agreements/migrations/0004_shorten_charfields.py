@@ -0,0 +1,130 @@
+# Generated by Django 5.0.10 on 2026-10-15 22:36
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models.functions import Length
+
+# The (model, field, new max_length) of every column this migration shortens.
+SHORTENED_FIELDS = [
+    (model_name, 'slug', 50)
+    for model_name in ('agreement', 'department', 'faculty', 'resource',
+                       'historicalagreement', 'historicaldepartment', 'historicalfaculty', 'historicalresource')
+] + [
+    (model_name, field_name, 150)
+    for model_name in ('signature', 'historicalsignature')
+    for field_name in ('username', 'first_name', 'last_name')
+] + [
+    ('licensecode', 'code', 128),
+    ('historicallicensecode', 'code', 128),
+]
+
+
+def check_no_values_too_long(apps, schema_editor):
+    """
+    Abort before shortening any column if existing values wouldn't fit.
+
+    SQLite doesn't enforce the new lengths, but PostgreSQL refuses the ALTER and MySQL may
+    silently truncate, so list the rows to fix by hand instead.
+    """
+    too_long = []
+    for model_name, field_name, max_length in SHORTENED_FIELDS:
+        model = apps.get_model('agreements', model_name)
+        rows = (model.objects.using(schema_editor.connection.alias)
+                .annotate(value_length=Length(field_name))
+                .filter(value_length__gt=max_length)
+                .values_list('pk', field_name))
+        too_long.extend(f'{model_name}.{field_name} (pk={pk}, longer than {max_length}): {value}'
+                        for pk, value in rows)
+    if too_long:
+        raise ValueError('Shorten these values before running this migration again:\n' + '\n'.join(too_long))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agreements', '0003_auto_20230401_0036'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_no_values_too_long, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='agreement',
+            name='slug',
+            field=models.SlugField(help_text='URL-safe identifier for the agreement.', unique=True, validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')]),
+        ),
+        migrations.AlterField(
+            model_name='department',
+            name='slug',
+            field=models.SlugField(help_text='URL-safe identifier for the department.', unique=True, validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')]),
+        ),
+        migrations.AlterField(
+            model_name='faculty',
+            name='slug',
+            field=models.SlugField(help_text='URL-safe identifier for the faculty.', unique=True, validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')]),
+        ),
+        migrations.AlterField(
+            model_name='historicalagreement',
+            name='slug',
+            field=models.SlugField(help_text='URL-safe identifier for the agreement.', validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')]),
+        ),
+        migrations.AlterField(
+            model_name='historicaldepartment',
+            name='slug',
+            field=models.SlugField(help_text='URL-safe identifier for the department.', validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')]),
+        ),
+        migrations.AlterField(
+            model_name='historicalfaculty',
+            name='slug',
+            field=models.SlugField(help_text='URL-safe identifier for the faculty.', validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')]),
+        ),
+        migrations.AlterField(
+            model_name='historicallicensecode',
+            name='code',
+            field=models.CharField(max_length=128),
+        ),
+        migrations.AlterField(
+            model_name='historicalresource',
+            name='slug',
+            field=models.SlugField(help_text='URL-safe identifier for the resource.', validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')]),
+        ),
+        migrations.AlterField(
+            model_name='historicalsignature',
+            name='first_name',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='historicalsignature',
+            name='last_name',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='historicalsignature',
+            name='username',
+            field=models.CharField(max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='licensecode',
+            name='code',
+            field=models.CharField(max_length=128),
+        ),
+        migrations.AlterField(
+            model_name='resource',
+            name='slug',
+            field=models.SlugField(help_text='URL-safe identifier for the resource.', unique=True, validators=[django.core.validators.RegexValidator(inverse_match=True, message="The slug cannot be 'create'.", regex='^create$')]),
+        ),
+        migrations.AlterField(
+            model_name='signature',
+            name='first_name',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='signature',
+            name='last_name',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='signature',
+            name='username',
+            field=models.CharField(max_length=150),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.10 on 2026-10-15 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agreements', '0004_shorten_charfields'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='agreement',
+            constraint=models.CheckConstraint(check=models.Q(('slug', 'create'), _negated=True), name='agreements_agreement_slug_not_create', violation_error_message="The slug cannot be 'create'."),
+        ),
+        migrations.AddConstraint(
+            model_name='department',
+            constraint=models.CheckConstraint(check=models.Q(('slug', 'create'), _negated=True), name='agreements_department_slug_not_create', violation_error_message="The slug cannot be 'create'."),
+        ),
+        migrations.AddConstraint(
+            model_name='faculty',
+            constraint=models.CheckConstraint(check=models.Q(('slug', 'create'), _negated=True), name='agreements_faculty_slug_not_create', violation_error_message="The slug cannot be 'create'."),
+        ),
+        migrations.AddConstraint(
+            model_name='resource',
+            constraint=models.CheckConstraint(check=models.Q(('slug', 'create'), _negated=True), name='agreements_resource_slug_not_create', violation_error_message="The slug cannot be 'create'."),
+        ),
+    ]
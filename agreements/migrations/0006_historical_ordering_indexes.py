@@ -0,0 +1,39 @@
+# Generated by Django 5.0.10 on 2026-10-15 22:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agreements', '0005_slug_not_create_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalagreement',
+            index=models.Index(fields=['-history_date', '-history_id'], name='hist_agreement_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicaldepartment',
+            index=models.Index(fields=['-history_date', '-history_id'], name='hist_department_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalfaculty',
+            index=models.Index(fields=['-history_date', '-history_id'], name='hist_faculty_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicallicensecode',
+            index=models.Index(fields=['-history_date', '-history_id'], name='hist_licensecode_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalresource',
+            index=models.Index(fields=['-history_date', '-history_id'], name='hist_resource_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalsignature',
+            index=models.Index(fields=['-history_date', '-history_id'], name='hist_signature_order_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.10 on 2026-10-15 23:01
+
+import agreements.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agreements', '0007_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='agreement',
+            name='body',
+            field=agreements.models.CachedCleanerBleachField(help_text='HTML content of the agreement. The following tags are allowed: h3, p, a, abbr, cite, code, small, em, strong, sub, sup, u, ul, ol, li, br. Changing this field after the agreement has been signed by patrons is strongly discouraged.'),
+        ),
+        migrations.AlterField(
+            model_name='historicalagreement',
+            name='body',
+            field=agreements.models.CachedCleanerBleachField(help_text='HTML content of the agreement. The following tags are allowed: h3, p, a, abbr, cite, code, small, em, strong, sub, sup, u, ul, ol, li, br. Changing this field after the agreement has been signed by patrons is strongly discouraged.'),
+        ),
+        migrations.AlterField(
+            model_name='historicalresource',
+            name='description',
+            field=agreements.models.CachedCleanerBleachField(blank=True, help_text='An HTML description of the resource. The following tags are allowed: h3, p, a, abbr, cite, code, small, em, strong, sub, sup, u, ul, ol, li, br.'),
+        ),
+        migrations.AlterField(
+            model_name='resource',
+            name='description',
+            field=agreements.models.CachedCleanerBleachField(blank=True, help_text='An HTML description of the resource. The following tags are allowed: h3, p, a, abbr, cite, code, small, em, strong, sub, sup, u, ul, ol, li, br.'),
+        ),
+    ]
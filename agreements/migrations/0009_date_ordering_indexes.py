@@ -0,0 +1,23 @@
+# Generated by Django 5.0.10 on 2026-10-15 23:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agreements', '0008_cached_cleaner_bleach_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='licensecode',
+            index=models.Index(condition=models.Q(('signature__isnull', True)), fields=['resource', 'added'], name='licensecode_unassigned_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signature',
+            index=models.Index(fields=['agreement', '-signed_at'], name='signature_agr_signed_at_idx'),
+        ),
+    ]
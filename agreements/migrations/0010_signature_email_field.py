@@ -0,0 +1,23 @@
+# Generated by Django 5.0.10 on 2026-10-15 23:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agreements', '0009_date_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='historicalsignature',
+            name='email',
+            field=models.EmailField(max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='signature',
+            name='email',
+            field=models.EmailField(max_length=200),
+        ),
+    ]
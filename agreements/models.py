@@ -5,39 +5,112 @@ https://docs.djangoproject.com/en/3.0/topics/db/models/
 """
 
 from datetime import timedelta
+from functools import lru_cache
+import threading
 
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator, URLValidator, validate_email
-from django.db import models
-from django.db.models import Q, F, Count, Prefetch, UniqueConstraint, CheckConstraint
+from django.db import models, transaction
+from django.db.models import Q, F, Count, FilteredRelation, UniqueConstraint, CheckConstraint
 from django.db.models.query import QuerySet
-from django.urls import reverse
+from django.urls import reverse, get_script_prefix, get_urlconf
+from django.utils.safestring import mark_safe
 from django.utils.timezone import now
 
+from bleach.sanitizer import Cleaner
 from django_bleach.models import BleachField
 from simple_history.models import HistoricalRecords
+from simple_history.utils import bulk_create_with_history
 
 DEFAULT_ALLOWED_TAGS = ['h3', 'p', 'a', 'abbr', 'cite', 'code',
                         'small', 'em', 'strong', 'sub', 'sup',
                         'u', 'ul', 'ol', 'li', 'br']
 
+ALLOWED_TAGS_TEXT = ", ".join(DEFAULT_ALLOWED_TAGS)
+
+BLEACH_FIELD_OPTIONS = {
+    'allowed_tags': DEFAULT_ALLOWED_TAGS,
+    'allowed_attributes': {'a': ['href', 'title'], 'abbr': ['title'], 'acronym': ['title']},
+    'allowed_protocols': ['https', 'mailto'],
+    'strip_tags': False,
+    'strip_comments': True,
+}
+
+NO_CREATE_SLUG_VALIDATOR = RegexValidator(regex="^create$",
+                                          message="The slug cannot be 'create'.",
+                                          inverse_match=True)
+
+HTTPS_URL_VALIDATOR = URLValidator(schemes=['https'],
+                                   message="Enter a valid URL. It must start with 'https://'.",
+                                   code='need_https')
+
+
+def slug_field(entity):
+    """Returns a new unique SlugField for entity, which can't be 'create'"""
+    return models.SlugField(max_length=50, unique=True,
+                            validators=[NO_CREATE_SLUG_VALIDATOR],
+                            help_text=f'URL-safe identifier for the {entity}.')
+
+
+SLUG_URL_PLACEHOLDER = '__SLUG__'
+
+
+@lru_cache(maxsize=16)
+def slug_url_template(viewname, script_prefix, urlconf):  # pylint: disable=unused-argument
+    """Reverse viewname once with a placeholder slug, keyed on the script prefix and urlconf reverse() depends on"""
+    return reverse(viewname, urlconf=urlconf, args=[SLUG_URL_PLACEHOLDER])
+
+
+def slug_url(viewname, slug):
+    """Returns the URL for viewname and slug, without walking the URL resolver on every call"""
+    return slug_url_template(viewname, get_script_prefix(), get_urlconf()).replace(SLUG_URL_PLACEHOLDER, slug)
+
+
+class IndexedHistoricalRecords(HistoricalRecords):
+    """HistoricalRecords with an index matching the default ordering of the historical model"""
+
+    def get_meta_options(self, model):
+        """Add an index on (-history_date, -history_id) so ordered history queries don't need a sort"""
+        meta_fields = super().get_meta_options(model)
+        meta_fields['indexes'] = [*meta_fields.get('indexes', []),
+                                  models.Index(fields=['-history_date', '-history_id'],
+                                               name=f'hist_{model._meta.model_name}_order_idx')]
+        return meta_fields
+
+
+class CachedCleanerBleachField(BleachField):
+    """BleachField which reuses its bleach Cleaner, rather than building a new one on every save"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Cleaners aren't thread safe, so keep one per thread.
+        self._local = threading.local()
+
+    def get_cleaner(self):
+        """Return this thread's Cleaner for the field's bleach options"""
+        cleaner = getattr(self._local, 'cleaner', None)
+        if cleaner is None:
+            cleaner = self._local.cleaner = Cleaner(**self.bleach_kwargs)
+        return cleaner
+
+    def pre_save(self, model_instance, add):
+        data = getattr(model_instance, self.attname)
+        if data is None:
+            return data
+        clean_value = self.get_cleaner().clean(data) if data else ''
+        setattr(model_instance, self.attname, mark_safe(clean_value))
+        return clean_value
+
 
 class Resource(models.Model):
     """Resources which are protected by Agreements"""
     name = models.CharField(max_length=300, unique=True)
-    slug = models.SlugField(max_length=300, unique=True,
-                            validators=[RegexValidator(regex="^create$",
-                                                       message="The slug cannot be 'create'.",
-                                                       inverse_match=True)],
-                            help_text='URL-safe identifier for the resource.')
-    description = BleachField(blank=True,
-                              allowed_tags=DEFAULT_ALLOWED_TAGS,
-                              allowed_attributes={'a': ['href', 'title'], 'abbr': ['title'], 'acronym': ['title']},
-                              allowed_protocols=['https', 'mailto'],
-                              strip_tags=False,
-                              strip_comments=True,
-                              help_text=f'An HTML description of the resource. '
-                                        f'The following tags are allowed: {", ".join(DEFAULT_ALLOWED_TAGS)}.')
+    slug = slug_field('resource')
+    description = CachedCleanerBleachField(blank=True,
+                                           help_text='An HTML description of the resource. '
+                                                     f'The following tags are allowed: {ALLOWED_TAGS_TEXT}.',
+                                           **BLEACH_FIELD_OPTIONS)
     low_codes_threshold = models.PositiveSmallIntegerField(default=51,
                                                            help_text='If the number of unassigned license codes '
                                                                      'associated with this resource falls below this '
@@ -49,9 +122,14 @@ class Resource(models.Model):
                                                  'remaning unassigned license codes. If empty, no emails are sent.')
     hidden = models.BooleanField(default=False,
                                  help_text='Hidden resources do not appear in the list of active resources.')
-    history = HistoricalRecords()
+    history = IndexedHistoricalRecords()
 
     class Meta:
+        constraints = [
+            CheckConstraint(check=~Q(slug='create'),
+                            name='%(app_label)s_%(class)s_slug_not_create',
+                            violation_error_message="The slug cannot be 'create'.")
+        ]
         permissions = [
             ('resource_view_file_access_stats', 'Can view the file access statistics associated with this resource'),
             ('resource_view_licensecodes', 'Can view the license codes associated with this resource'),
@@ -60,7 +138,7 @@ class Resource(models.Model):
 
     def get_absolute_url(self):
         """Returns the canonical URL for a Faculty"""
-        return reverse('resources_read', args=[self.slug])
+        return slug_url('resources_read', self.slug)
 
     def __str__(self):
         """Returns the string representation of a Faculty"""
@@ -70,16 +148,19 @@ class Resource(models.Model):
 class Faculty(models.Model):
     """Faculties of the University"""
     name = models.CharField(max_length=300, unique=True)
-    slug = models.SlugField(max_length=300, unique=True,
-                            validators=[RegexValidator(regex="^create$",
-                                                       message="The slug cannot be 'create'.",
-                                                       inverse_match=True)],
-                            help_text='URL-safe identifier for the faculty.')
-    history = HistoricalRecords()
+    slug = slug_field('faculty')
+    history = IndexedHistoricalRecords()
+
+    class Meta:
+        constraints = [
+            CheckConstraint(check=~Q(slug='create'),
+                            name='%(app_label)s_%(class)s_slug_not_create',
+                            violation_error_message="The slug cannot be 'create'.")
+        ]
 
     def get_absolute_url(self):
         """Returns the canonical URL for a Faculty"""
-        return reverse('faculties_read', args=[self.slug])
+        return slug_url('faculties_read', self.slug)
 
     def __str__(self):
         """Returns the string representation of a Faculty"""
@@ -89,22 +170,21 @@ class Faculty(models.Model):
 class Department(models.Model):
     """Departments of the University, which group patrons. Departments are part of Facilties"""
     name = models.CharField(max_length=300)
-    slug = models.SlugField(max_length=300, unique=True,
-                            validators=[RegexValidator(regex="^create$",
-                                                       message="The slug cannot be 'create'.",
-                                                       inverse_match=True)],
-                            help_text='URL-safe identifier for the department.')
+    slug = slug_field('department')
     faculty = models.ForeignKey(Faculty, on_delete=models.CASCADE)
-    history = HistoricalRecords()
+    history = IndexedHistoricalRecords()
 
     class Meta:
         constraints = [
-            UniqueConstraint(fields=['name', 'faculty'], name='%(app_label)s_%(class)s_unique_depts_in_faculty')
+            UniqueConstraint(fields=['name', 'faculty'], name='%(app_label)s_%(class)s_unique_depts_in_faculty'),
+            CheckConstraint(check=~Q(slug='create'),
+                            name='%(app_label)s_%(class)s_slug_not_create',
+                            violation_error_message="The slug cannot be 'create'.")
         ]
 
     def get_absolute_url(self):
         """Returns the canonical URL for a Department"""
-        return reverse('departments_read', args=[self.slug])
+        return slug_url('departments_read', self.slug)
 
     def __str__(self):
         """Returns the string representation of a Faculty"""
@@ -116,35 +196,31 @@ class AgreementQuerySet(QuerySet):
 
     def valid(self):
         """Filter out posts that aren't valid right now"""
+        right_now = now()
         return (self
-                .filter(start__lte=now())
+                .filter(start__lte=right_now)
                 .filter(
-                    Q(end__gte=now()) |
+                    Q(end__gte=right_now) |
                     Q(end__isnull=True)
                 )
                 .exclude(hidden=True))
 
     def for_resource_with_signature(self, resource, signatory):
-        """Return a list of agreements with the associated signature for a resource and user"""
+        """Return a list of agreements, bodies deferred, with the associated signature for a resource and user"""
         if resource is None:
             raise TypeError('resource cannot be none')
         if signatory is None:
             raise TypeError('signatory cannot be none')
 
-        signature_prefetch = Prefetch('signature_set',
-                                      queryset=Signature.objects.filter(signatory=signatory),
-                                      to_attr='associated_signature_list')
-        agreements = (self
-                      .filter(resource=resource)
-                      .prefetch_related(signature_prefetch)
-                      .order_by('-created'))
-
-        # Because of database constraints, the associated_signature_list will always be 0 or 1 elements long.
-        for agreement in agreements:
-            if len(agreement.associated_signature_list) > 0:
-                agreement.associated_signature = agreement.associated_signature_list[0]
-
-        return agreements
+        # Because of database constraints, at most one signature per agreement matches the condition,
+        # so the filtered relation can be joined and selected like a single-valued relation.
+        return (self                                        # pylint: disable=not-callable
+                .filter(resource=resource)
+                .annotate(associated_signature=FilteredRelation('signature',
+                                                                condition=Q(signature__signatory=signatory)))
+                .select_related('associated_signature__license_code')
+                .defer('body')
+                .order_by('-created'))
 
 
 def date_121_days_from_now():
@@ -155,11 +231,7 @@ def date_121_days_from_now():
 class Agreement(models.Model):
     """Agreements are documents which are signed by patrons to access resources"""
     title = models.CharField(max_length=300, unique=True)
-    slug = models.SlugField(max_length=300, unique=True,
-                            validators=[RegexValidator(regex="^create$",
-                                                       message="The slug cannot be 'create'.",
-                                                       inverse_match=True)],
-                            help_text='URL-safe identifier for the agreement.')
+    slug = slug_field('agreement')
     resource = models.ForeignKey(Resource, on_delete=models.PROTECT)
     created = models.DateField(auto_now_add=True)
     start = models.DateTimeField(default=now,
@@ -170,33 +242,33 @@ class Agreement(models.Model):
                                default=date_121_days_from_now,
                                help_text='The agreement is valid until this date and time. '
                                          'Format (UTC timezone): YYYY-MM-DD HH:MM:SS')
-    body = BleachField(allowed_tags=DEFAULT_ALLOWED_TAGS,
-                       allowed_attributes={'a': ['href', 'title'], 'abbr': ['title'], 'acronym': ['title']},
-                       allowed_protocols=['https', 'mailto'],
-                       strip_tags=False,
-                       strip_comments=True,
-                       help_text='HTML content of the agreement. '
-                                 f'The following tags are allowed: {", ".join(DEFAULT_ALLOWED_TAGS)}. '
-                                 'Changing this field after the agreement has been signed '
-                                 'by patrons is strongly discouraged.')
-
-    redirect_url = models.URLField(validators=[URLValidator(schemes=['https'],
-                                                            message="Enter a valid URL. "
-                                                                    "It must start with 'https://'.",
-                                                            code='need_https')],
+    body = CachedCleanerBleachField(help_text='HTML content of the agreement. '
+                                              f'The following tags are allowed: {ALLOWED_TAGS_TEXT}. '
+                                              'Changing this field after the agreement has been signed '
+                                              'by patrons is strongly discouraged.',
+                                    **BLEACH_FIELD_OPTIONS)
+
+    redirect_url = models.URLField(validators=[HTTPS_URL_VALIDATOR],
                                    help_text="URL displayed to patrons after signing the agreement. "
                                              "It is prefixed by the text 'Return to '. It must start with 'https://'.")
     redirect_text = models.CharField(max_length=300, help_text='The text of the URL redirect link.')
     hidden = models.BooleanField(default=False,
                                  help_text='Hidden agreements do not appear in the list of active agreements.')
-    history = HistoricalRecords()
+    history = IndexedHistoricalRecords()
 
     objects = AgreementQuerySet.as_manager()
 
     class Meta:
         constraints = [
             CheckConstraint(check=Q(end__isnull=True) | Q(end__gt=F('start')),
-                            name="%(app_label)s_%(class)s_end_null_or_gt_start")
+                            name="%(app_label)s_%(class)s_end_null_or_gt_start"),
+            CheckConstraint(check=~Q(slug='create'),
+                            name='%(app_label)s_%(class)s_slug_not_create',
+                            violation_error_message="The slug cannot be 'create'.")
+        ]
+        indexes = [
+            models.Index(fields=['resource', '-created'], name='agreement_resource_created_idx'),
+            models.Index(fields=['hidden', 'start', 'end'], name='agreement_valid_idx')
         ]
         permissions = [
             ('agreement_search_signatures', 'Can search signatures associated with this agreement')
@@ -204,17 +276,14 @@ class Agreement(models.Model):
 
     def get_absolute_url(self):
         """Returns the canonical URL for an Agreement"""
-        return reverse('agreements_read', args=[self.slug])
+        return slug_url('agreements_read', self.slug)
 
     def valid(self):
         """Is this agreement not hidden, and currently valid?"""
-        if not self.hidden:
-            if now() >= self.start:
-                if self.end is None:
-                    return True
-                if now() <= self.end:
-                    return True
-        return False
+        if self.hidden:
+            return False
+        right_now = now()
+        return self.start <= right_now and (self.end is None or right_now <= self.end)
 
 
 class SignatureQuerySet(QuerySet):
@@ -233,6 +302,10 @@ class SignatureQuerySet(QuerySet):
             Q(department__faculty__name__icontains=query)
             )
 
+    def with_related(self):
+        """Join the agreement, department, and faculty, so rendering signatures doesn't query per row"""
+        return self.select_related('agreement', 'department__faculty')  # pylint: disable=not-callable
+
     def count_per_department(self):
         """Return a group by and count by department"""
         return (self
@@ -256,13 +329,13 @@ class Signature(models.Model):
     """
     agreement = models.ForeignKey(Agreement, on_delete=models.CASCADE, limit_choices_to={'hidden': False})
     signatory = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
-    username = models.CharField(max_length=300)
-    first_name = models.CharField(max_length=300, blank=True)
-    last_name = models.CharField(max_length=300, blank=True)
-    email = models.CharField(max_length=200, validators=[validate_email])
+    username = models.CharField(max_length=150)
+    first_name = models.CharField(max_length=150, blank=True)
+    last_name = models.CharField(max_length=150, blank=True)
+    email = models.EmailField(max_length=200)
     department = models.ForeignKey(Department, on_delete=models.PROTECT)
     signed_at = models.DateTimeField(auto_now_add=True)
-    history = HistoricalRecords()
+    history = IndexedHistoricalRecords()
 
     objects = SignatureQuerySet.as_manager()
 
@@ -270,27 +343,68 @@ class Signature(models.Model):
         constraints = [
             UniqueConstraint(fields=['agreement', 'signatory'], name='%(app_label)s_%(class)s_unique_signature')
         ]
+        indexes = [
+            models.Index(fields=['signatory', 'agreement'], name='signature_signatory_agr_idx'),
+            models.Index(fields=['agreement', '-signed_at'], name='signature_agr_signed_at_idx')
+        ]
+
+
+class LicenseCodeQuerySet(QuerySet):
+    """A custom queryset for LicenseCodes"""
+
+    def bulk_create_with_history(self, license_codes, batch_size=1000):
+        """Insert the license codes and their historical records in batches, instead of two INSERTs per code"""
+        return bulk_create_with_history(license_codes, self.model, batch_size=batch_size)
+
+    def bulk_load(self, resource, codes, batch_size=1000):
+        """Add the codes the resource doesn't already have, returning the number of license codes added"""
+        if resource is None:
+            raise TypeError('resource cannot be none')
+
+        existing_codes = set(self.filter(resource=resource).values_list('code', flat=True))
+        # dict.fromkeys drops codes repeated in the input, keeping their order.
+        license_codes = [self.model(resource=resource, code=code)
+                         for code in dict.fromkeys(codes) if code not in existing_codes]
+        # Only the field level checks, the uniqueness of the codes has already been enforced above.
+        for license_code in license_codes:
+            try:
+                license_code.clean_fields(exclude=['resource', 'signature'])
+            except ValidationError as error:
+                raise ValidationError(
+                    '%(code)s is not a valid license code.',
+                    code='invalid_license_code',
+                    params={'code': license_code.code},
+                ) from error
+        with transaction.atomic():
+            self.bulk_create_with_history(license_codes, batch_size=batch_size)
+        return len(license_codes)
 
 
 class LicenseCode(models.Model):
     """License Codes are provided to patrons after they sign an agreement."""
     resource = models.ForeignKey(Resource, on_delete=models.CASCADE)
-    code = models.CharField(max_length=300)
+    code = models.CharField(max_length=128)
     added = models.DateTimeField(auto_now_add=True)
     signature = models.OneToOneField(Signature, on_delete=models.SET_NULL,
                                      related_name='license_code', blank=True, null=True)
-    history = HistoricalRecords()
+    history = IndexedHistoricalRecords()
+
+    objects = LicenseCodeQuerySet.as_manager()
 
     class Meta:
         constraints = [
             UniqueConstraint(fields=['resource', 'code'], name='%(app_label)s_%(class)s_unique_codes_per_resource')
         ]
+        indexes = [
+            models.Index(fields=['resource', 'added'], name='licensecode_unassigned_idx',
+                         condition=Q(signature__isnull=True))
+        ]
 
 
 class FileDownloadEventQuerySet(QuerySet):
     """A custom queryset for FileDownloadEvents"""
 
-    def get_or_create_if_no_duplicates_past_5_minutes(self, resource, accesspath, session_key):
+    def get_or_create_if_no_duplicates_past_5_minutes(self, resource, accesspath, session_key, *, _now=now):
         """Has a FileDownloadEvent for the same path and session been added in the past 5 minutes?"""
         if resource is None:
             raise TypeError('resource cannot be none')
@@ -300,11 +414,17 @@ class FileDownloadEventQuerySet(QuerySet):
             raise TypeError('session_key cannot be none')
 
         # Because the Unique Constraint on FileDownloadEvent doesn't enforce the time window
-        # it might be possible that the same user might be able to add two events within the time window.
-        return self.get_or_create(resource=resource,
-                                  path=accesspath,
-                                  session_key=session_key,
-                                  at__gte=now()-timedelta(minutes=5))
+        # it might be possible that the same user might be able to add two events within the time window,
+        # so take the first match rather than using get_or_create, which would raise MultipleObjectsReturned.
+        existing = (self
+                    .filter(resource=resource,
+                            path=accesspath,
+                            session_key=session_key,
+                            at__gte=_now()-timedelta(minutes=5))
+                    .first())
+        if existing is not None:
+            return existing, False
+        return self.create(resource=resource, path=accesspath, session_key=session_key), True
 
     def download_count_per_path_for_resource(self, resource):
         """Group by and count on path for FileDownloadEvents"""
@@ -7,7 +7,7 @@ https://docs.djangoproject.com/en/3.0/topics/signals/
 from django.conf import settings
 from django.core.mail import send_mail
 
-from .models import LicenseCode
+from .models import Resource, LicenseCode
 
 
 def warn_low_number_unassigned_licensecodes(sender, **kwargs):  # pylint: disable=unused-argument
@@ -17,12 +17,24 @@ def warn_low_number_unassigned_licensecodes(sender, **kwargs):  # pylint: disabl
     remaning is divisible by 10.
     """
 
-    if 'instance' not in kwargs:
+    instance = kwargs.get('instance')
+    if instance is None:
         return
-    resource = kwargs['instance'].resource
+    if LicenseCode._meta.get_field('resource').is_cached(instance):
+        resource = instance.resource
+    else:
+        # Codes assigned to a signature are loaded without their resource, only fetch the columns used here.
+        resource = (Resource.objects
+                    .only('name', 'low_codes_email', 'low_codes_threshold')
+                    .get(pk=instance.resource_id))
     if resource.low_codes_email == '':
         return
-    num_rem = LicenseCode.objects.filter(resource=resource, signature__isnull=True).count()
+    # Only count up to one past the threshold, there is no need to count every unassigned code
+    # when there are more than enough left. At or under the threshold, the count is exact.
+    num_rem = (LicenseCode.objects
+               .filter(resource=resource, signature__isnull=True)
+               .order_by()[:resource.low_codes_threshold + 1]
+               .count())
     if num_rem > resource.low_codes_threshold:
         return
     if (num_rem % 10) != 0:
@@ -30,18 +30,10 @@ class GroupedModelChoiceFieldTestCase(TestCase):
 
     def test_groupedmodelchoicefield(self):
         """Test to see that the choice field is grouped as expected"""
-        test_faculty_1 = Faculty(name='Test Faculty One', slug='test_faculty_1')
-        test_faculty_1.full_clean()
-        test_faculty_1.save()
-        test_faculty_2 = Faculty(name='Test Faculty Two', slug='test_faculty_2')
-        test_faculty_2.full_clean()
-        test_faculty_2.save()
-        test_department_1 = Department(name='Test Department One', slug='test_department_1', faculty=test_faculty_1)
-        test_department_1.full_clean()
-        test_department_1.save()
-        test_department_2 = Department(name='Test Department Two', slug='test_department_2', faculty=test_faculty_2)
-        test_department_2.full_clean()
-        test_department_2.save()
+        test_faculty_1 = Faculty.objects.create(name='Test Faculty One', slug='test_faculty_1')
+        test_faculty_2 = Faculty.objects.create(name='Test Faculty Two', slug='test_faculty_2')
+        Department.objects.create(name='Test Department One', slug='test_department_1', faculty=test_faculty_1)
+        Department.objects.create(name='Test Department Two', slug='test_department_2', faculty=test_faculty_2)
 
         field = GroupedModelChoiceField(
             label='Your Department',
@@ -5,25 +5,46 @@ https://docs.djangoproject.com/en/3.0/topics/testing/
 """
 
 from datetime import timedelta
-from unittest.mock import patch
 import random
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse, set_script_prefix, clear_script_prefix
 from django.utils.timezone import now
 
-from .models import Resource, Faculty, Department, Agreement, Signature, FileDownloadEvent
+from .models import Resource, Faculty, Department, Agreement, Signature, LicenseCode, FileDownloadEvent
 
+User = get_user_model()
 
+
+class AgreementFixturesTestCase(TestCase):
+    """Base class for test cases which need a faculty, department, resource, and agreement."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the faculty, department, resource, and agreement shared by the test case's tests"""
+        cls.test_faculty = Faculty.objects.create(name='Test', slug='test')
+        cls.test_department = Department.objects.create(name='Test', slug='test', faculty=cls.test_faculty)
+        cls.test_resource = Resource.objects.create(name='Test', slug='test', description='')
+        cls.test_agreement = Agreement.objects.create(title='test-one',
+                                                      slug='test-one',
+                                                      resource=cls.test_resource,
+                                                      body='body',
+                                                      redirect_url='https://example.com',
+                                                      redirect_text='example-redirect')
+
+
+@override_settings(SIMPLE_HISTORY_ENABLED=False)
 class ResourceModelTestCase(TestCase):
     """Tests for the Resource model."""
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Create test model instances"""
-        self.test_resource = Resource(name='Test', slug='test', description='')
-        self.test_resource.full_clean()
-        self.test_resource.save()
+        cls.test_resource = Resource.objects.create(name='Test', slug='test', description='')
 
     def test_slug_value_create(self):
         """Check that the slug value can't be 'create'"""
@@ -31,6 +52,11 @@ class ResourceModelTestCase(TestCase):
             self.test_resource.slug = 'create'
             self.test_resource.full_clean()
 
+    def test_slug_value_create_database(self):
+        """Check that the database refuses a slug value of 'create', even when validation is skipped"""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Resource.objects.create(name='Create', slug='create', description='')
+
     def test_slug_can_contain_create(self):
         """Check that the slug can contain the string 'create'"""
         self.test_resource.slug = '123create'
@@ -42,6 +68,17 @@ class ResourceModelTestCase(TestCase):
         self.test_resource.slug = '123create123'
         self.test_resource.full_clean()
 
+    def test_get_absolute_url(self):
+        """Check that the cached URL template matches reverse(), and follows the script prefix"""
+        self.assertEqual(self.test_resource.get_absolute_url(), reverse('resources_read', args=['test']))
+        self.test_resource.slug = 'other'
+        self.assertEqual(self.test_resource.get_absolute_url(), reverse('resources_read', args=['other']))
+        set_script_prefix('/prefix/')
+        try:
+            self.assertEqual(self.test_resource.get_absolute_url(), '/prefix/resources/other/')
+        finally:
+            clear_script_prefix()
+
     def test_bleach_body(self):
         """Check that the bleach library is working."""
         self.test_resource.description = "<script>alert('hi!');</script>"
@@ -50,14 +87,14 @@ class ResourceModelTestCase(TestCase):
         self.assertEqual(self.test_resource.description, "&lt;script&gt;alert('hi!');&lt;/script&gt;")
 
 
+@override_settings(SIMPLE_HISTORY_ENABLED=False)
 class FacultyModelTestCase(TestCase):
     """Tests for the Faculty model."""
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Create test model instances"""
-        self.test_faculty = Faculty(name='Test', slug='test')
-        self.test_faculty.full_clean()
-        self.test_faculty.save()
+        cls.test_faculty = Faculty.objects.create(name='Test', slug='test')
 
     def test_slug_value_create(self):
         """Check that the slug value can't be 'create'"""
@@ -77,17 +114,15 @@ class FacultyModelTestCase(TestCase):
         self.test_faculty.full_clean()
 
 
+@override_settings(SIMPLE_HISTORY_ENABLED=False)
 class DepartmentModelTestCase(TestCase):
     """Tests for the Department model."""
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Create test model instances"""
-        self.test_faculty = Faculty(name='Test', slug='test')
-        self.test_faculty.full_clean()
-        self.test_faculty.save()
-        self.test_department = Department(name='Test', slug='test', faculty=self.test_faculty)
-        self.test_department.full_clean()
-        self.test_department.save()
+        cls.test_faculty = Faculty.objects.create(name='Test', slug='test')
+        cls.test_department = Department.objects.create(name='Test', slug='test', faculty=cls.test_faculty)
 
     def test_slug_value_create(self):
         """Check that the slug value can't be 'create'"""
@@ -107,29 +142,10 @@ class DepartmentModelTestCase(TestCase):
         self.test_department.full_clean()
 
 
-class AgreementModelTestCase(TestCase):
+@override_settings(SIMPLE_HISTORY_ENABLED=False, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AgreementModelTestCase(AgreementFixturesTestCase):
     """Tests for the Agreement model."""
 
-    def setUp(self):
-        """Create test model instances"""
-        self.test_faculty = Faculty(name='Test', slug='test')
-        self.test_faculty.full_clean()
-        self.test_faculty.save()
-        self.test_department = Department(name='Test', slug='test', faculty=self.test_faculty)
-        self.test_department.full_clean()
-        self.test_department.save()
-        self.test_resource = Resource(name='Test', slug='test', description='')
-        self.test_resource.full_clean()
-        self.test_resource.save()
-        self.test_agreement = Agreement(title='test-one',
-                                        slug='test-one',
-                                        resource=self.test_resource,
-                                        body='body',
-                                        redirect_url='https://example.com',
-                                        redirect_text='example-redirect')
-        self.test_agreement.full_clean()
-        self.test_agreement.save()
-
     def test_bleach_body(self):
         """Check that the bleach library is working."""
         self.test_agreement.body = "<script>alert('hi!');</script>"
@@ -137,6 +153,11 @@ class AgreementModelTestCase(TestCase):
         self.test_agreement.save()
         self.assertEqual(self.test_agreement.body, "&lt;script&gt;alert('hi!');&lt;/script&gt;")
 
+    def test_bleach_cleaner_reused(self):
+        """Check that the body field keeps its bleach Cleaner between saves."""
+        body_field = Agreement._meta.get_field('body')
+        self.assertIs(body_field.get_cleaner(), body_field.get_cleaner())
+
     def test_redirect_url_https(self):
         """Check that redirect urls always use the https scheme."""
         with self.assertRaisesRegex(ValidationError, 'Enter a valid URL'):
@@ -160,84 +181,89 @@ class AgreementModelTestCase(TestCase):
         self.test_agreement.slug = '123create123'
         self.test_agreement.full_clean()
 
+    def test_valid(self):
+        """Check that the valid method and queryset agree on hidden, future, and expired agreements"""
+        self.assertTrue(self.test_agreement.valid())
+        self.assertIn(self.test_agreement, Agreement.objects.valid())
+
+        self.test_agreement.end = None
+        self.test_agreement.save()
+        self.assertTrue(self.test_agreement.valid())
+        self.assertIn(self.test_agreement, Agreement.objects.valid())
+
+        self.test_agreement.hidden = True
+        self.test_agreement.save()
+        self.assertFalse(self.test_agreement.valid())
+        self.assertNotIn(self.test_agreement, Agreement.objects.valid())
+
+        self.test_agreement.hidden = False
+        self.test_agreement.start = now() + timedelta(days=1)
+        self.test_agreement.save()
+        self.assertFalse(self.test_agreement.valid())
+        self.assertNotIn(self.test_agreement, Agreement.objects.valid())
+
+        self.test_agreement.start = now() - timedelta(days=2)
+        self.test_agreement.end = now() - timedelta(days=1)
+        self.test_agreement.save()
+        self.assertFalse(self.test_agreement.valid())
+        self.assertNotIn(self.test_agreement, Agreement.objects.valid())
+
     def test_for_resource_with_signature(self):
         """
         Test that the for_resource_with_signature method of the custom queryset returns
         the right signature
         """
-        test_user = get_user_model().objects.create_user(username='test',
-                                                         first_name='test',
-                                                         last_name='test',
-                                                         email='test@test.com',
-                                                         password='testtesttest')
-        test_user_2 = get_user_model().objects.create_user(username='test2',
-                                                           first_name='test2',
-                                                           last_name='test2',
-                                                           email='test2@test.com',
-                                                           password='testtesttest2')
-        test_sig = Signature(agreement=self.test_agreement,
-                             signatory=test_user,
-                             username=test_user.username,
-                             first_name=test_user.first_name,
-                             last_name=test_user.last_name,
-                             email=test_user.email,
-                             department=self.test_department)
-        test_sig.full_clean()
-        test_sig.save()
-        test_sig_2 = Signature(agreement=self.test_agreement,
-                               signatory=test_user_2,
-                               username=test_user_2.username,
-                               first_name=test_user_2.first_name,
-                               last_name=test_user_2.last_name,
-                               email=test_user_2.email,
-                               department=self.test_department)
-        test_sig_2.full_clean()
-        test_sig_2.save()
-
-        agreement = Agreement.objects.for_resource_with_signature(self.test_resource, test_user_2).first()
-        self.assertEqual(agreement.associated_signature.username, 'test2')
-
-
-class SignatureModelTestCase(TestCase):
+        password = make_password('testtesttest')
+        test_user, test_user_2, test_user_3 = User.objects.bulk_create([
+            User(username=username, first_name=username, last_name=username,
+                 email=f'{username}@test.com', password=password)
+            for username in ('test', 'test2', 'test3')
+        ])
+        Signature.objects.bulk_create([
+            Signature(agreement=self.test_agreement,
+                      signatory=user,
+                      username=user.username,
+                      first_name=user.first_name,
+                      last_name=user.last_name,
+                      email=user.email,
+                      department=self.test_department)
+            for user in (test_user, test_user_2)
+        ])
+
+        with self.assertNumQueries(1):
+            agreement = Agreement.objects.for_resource_with_signature(self.test_resource, test_user_2).first()
+            self.assertEqual(agreement.associated_signature.username, 'test2')
+            self.assertIsNone(getattr(agreement.associated_signature, 'license_code', None))
+
+        with self.assertNumQueries(1):
+            agreement = Agreement.objects.for_resource_with_signature(self.test_resource, test_user_3).first()
+            self.assertIsNone(getattr(agreement, 'associated_signature', None))
+
+
+@override_settings(SIMPLE_HISTORY_ENABLED=False, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SignatureModelTestCase(AgreementFixturesTestCase):
     """Tests for the Signature model."""
 
     @classmethod
     def setUpTestData(cls):
-        """Create a dummy agreement and user for the signatures to reference."""
-        cls.test_resource = Resource(name='Test', slug='test', description='')
-        cls.test_resource.full_clean()
-        cls.test_resource.save()
-        cls.test_faculty = Faculty(name='Test', slug='test')
-        cls.test_faculty.full_clean()
-        cls.test_faculty.save()
-        cls.test_department = Department(name='Test', slug='test', faculty=cls.test_faculty)
-        cls.test_department.full_clean()
-        cls.test_department.save()
-        cls.test_agreement = Agreement(title='test-one',
-                                       slug='test-one',
-                                       resource=cls.test_resource,
-                                       body='body',
-                                       redirect_url='https://example.com',
-                                       redirect_text='example-redirect')
-        cls.test_agreement.full_clean()
-        cls.test_agreement.save()
-        cls.test_user = get_user_model().objects.create_user(username='test',
-                                                             first_name='test',
-                                                             last_name='test',
-                                                             email='test@test.com',
-                                                             password='testtesttest')
-
-    def setUp(self):
-        """Initially, create a signature which passes all validation."""
-        self.test_sig = Signature(agreement=self.test_agreement,
-                                  signatory=self.test_user,
-                                  username=self.test_user.username,
-                                  first_name=self.test_user.first_name,
-                                  last_name=self.test_user.last_name,
-                                  email=self.test_user.email,
-                                  department=self.test_department)
+        """Create a dummy agreement and user, and a signature referencing them."""
+        super().setUpTestData()
+        cls.test_user = User.objects.create_user(username='test',
+                                                 first_name='test',
+                                                 last_name='test',
+                                                 email='test@test.com',
+                                                 password='testtesttest')
+        cls.test_sig = Signature.objects.create(agreement=cls.test_agreement,
+                                                signatory=cls.test_user,
+                                                username=cls.test_user.username,
+                                                first_name=cls.test_user.first_name,
+                                                last_name=cls.test_user.last_name,
+                                                email=cls.test_user.email,
+                                                department=cls.test_department)
+
+    def test_valid_signature(self):
+        """Check that the fixture signature passes all validation."""
         self.test_sig.full_clean()
-        self.test_sig.save()
 
     def test_unique_signature_constraint(self):
         """Check that the same user can't sign the same agreement twice."""
@@ -251,6 +277,13 @@ class SignatureModelTestCase(TestCase):
                                      department=self.test_department)
             new_test_sig.full_clean()
 
+    def test_with_related(self):
+        """with_related should load the agreement, department, and faculty in the same query"""
+        with self.assertNumQueries(1):
+            for signature in Signature.objects.with_related():
+                self.assertEqual(signature.agreement.title, 'test-one')
+                self.assertEqual(signature.department.faculty.name, 'Test')
+
     def test_counts(self):
         """count_per_department and count_per_faculty should return the right counts"""
 
@@ -264,77 +297,134 @@ class SignatureModelTestCase(TestCase):
                                                      redirect_url='https://example.com',
                                                      redirect_text='example-redirect')
 
-        for faculty_iter in range(random.randint(2, 5)):
-            faculty = Faculty.objects.create(name=f'Test faculty {faculty_iter}', slug=f'test{faculty_iter}')
-            for dept_iter in range(random.randint(2, 5)):
-                dept = Department.objects.create(name=f'Test department {faculty_iter}{dept_iter}',
-                                                 slug=f'test{faculty_iter}{dept_iter}',
-                                                 faculty=faculty)
-                for patron_iter in range(random.randint(5, 10)):
-                    user = get_user_model().objects.create_user(username=f'user{faculty_iter}{dept_iter}{patron_iter}',
-                                                                first_name=f't{faculty_iter}{dept_iter}{patron_iter}',
-                                                                last_name=f't{faculty_iter}{dept_iter}{patron_iter}',
-                                                                email=f'{faculty_iter}{dept_iter}{patron_iter}@t.com',
-                                                                password=f'{faculty_iter}{dept_iter}{patron_iter}')
-                    if random.random() > 0.5:
-                        Signature.objects.create(agreement=self.test_agreement,
-                                                 signatory=user,
-                                                 username=user.username,
-                                                 first_name=user.first_name,
-                                                 last_name=user.last_name,
-                                                 email=user.email,
-                                                 department=dept)
-                        correct_count_per_faculty[faculty.name] = correct_count_per_faculty.get(faculty.name, 0) + 1
+        faculties = Faculty.objects.bulk_create([
+            Faculty(name=f'Test faculty {faculty_iter}', slug=f'test{faculty_iter}')
+            for faculty_iter in range(3)
+        ])
+        depts = Department.objects.bulk_create([
+            Department(name=f'Test department {faculty_iter}{dept_iter}',
+                       slug=f'test{faculty_iter}{dept_iter}',
+                       faculty=faculty)
+            for faculty_iter, faculty in enumerate(faculties)
+            for dept_iter in range(3)
+        ])
+
+        password = make_password('testtesttest')
+        users_and_depts = []
+        for dept in depts:
+            for patron_iter in range(5):
+                user = User(username=f'user{dept.slug}{patron_iter}',
+                            first_name=f't{dept.slug}{patron_iter}',
+                            last_name=f't{dept.slug}{patron_iter}',
+                            email=f'{dept.slug}{patron_iter}@t.com',
+                            password=password)
+                users_and_depts.append((user, dept))
+        User.objects.bulk_create([user for user, _ in users_and_depts])
+
+        # Seeded, so a failure can be reproduced.
+        rng = random.Random(0)
+        signatures = []
+        for user, dept in users_and_depts:
+            for agreement in (self.test_agreement, another_agreement):
+                if rng.random() > 0.5:
+                    signatures.append(Signature(agreement=agreement,
+                                                signatory=user,
+                                                username=user.username,
+                                                first_name=user.first_name,
+                                                last_name=user.last_name,
+                                                email=user.email,
+                                                department=dept))
+                    if agreement == self.test_agreement:
+                        correct_count_per_faculty[dept.faculty.name] = (correct_count_per_faculty
+                                                                        .get(dept.faculty.name, 0) + 1)
                         correct_count_per_department[dept.name] = correct_count_per_department.get(dept.name, 0) + 1
-                    if random.random() > 0.5:
-                        Signature.objects.create(agreement=another_agreement,
-                                                 signatory=user,
-                                                 username=user.username,
-                                                 first_name=user.first_name,
-                                                 last_name=user.last_name,
-                                                 email=user.email,
-                                                 department=dept)
+        Signature.objects.bulk_create(signatures)
+
+        # Each count is a single GROUP BY query, not one query per faculty or department.
+        with self.assertNumQueries(1):
+            counts = {count['department__faculty__name']: count['num_sigs']
+                      for count in Signature.objects.filter(agreement=self.test_agreement).count_per_faculty()}
+        self.assertEqual(counts, correct_count_per_faculty)
 
-        count_per_faculty = Signature.objects.filter(agreement=self.test_agreement).count_per_faculty()
-        for count in count_per_faculty:
-            self.assertEqual(count['num_sigs'], correct_count_per_faculty[count['department__faculty__name']])
+        with self.assertNumQueries(1):
+            counts = {count['department__name']: count['num_sigs']
+                      for count in Signature.objects.filter(agreement=self.test_agreement).count_per_department()}
+        self.assertEqual(counts, correct_count_per_department)
 
-        count_per_department = Signature.objects.filter(agreement=self.test_agreement).count_per_department()
-        for count in count_per_department:
-            self.assertEqual(count['num_sigs'], correct_count_per_department[count['department__name']])
 
+class LicenseCodeTestCase(TestCase):
+    """Tests for the LicenseCode model."""
 
+    @classmethod
+    def setUpTestData(cls):
+        """Create test model instances"""
+        cls.test_resource = Resource.objects.create(name='Test', slug='test', description='')
+
+    def test_bulk_create_with_history(self):
+        """Does bulk_create_with_history create the license codes and their historical records?"""
+        license_codes = [LicenseCode(resource=self.test_resource, code=f'code{i}') for i in range(25)]
+        LicenseCode.objects.bulk_create_with_history(license_codes, batch_size=10)
+        self.assertEqual(LicenseCode.objects.filter(resource=self.test_resource).count(), 25)
+        for license_code in LicenseCode.objects.filter(resource=self.test_resource):
+            self.assertEqual(license_code.history.filter(history_type='+').count(), 1)
+
+    def test_bulk_load(self):
+        """Does bulk_load add only the codes the resource doesn't already have?"""
+        LicenseCode.objects.create(resource=self.test_resource, code='existing')
+        added = LicenseCode.objects.bulk_load(self.test_resource, ['existing', 'new1', 'new2'])
+        self.assertEqual(added, 2)
+        self.assertEqual(set(LicenseCode.objects.filter(resource=self.test_resource).values_list('code', flat=True)),
+                         {'existing', 'new1', 'new2'})
+
+        # Codes repeated in the input are only added once.
+        added = LicenseCode.objects.bulk_load(self.test_resource, ['new4', 'new4', 'new1'])
+        self.assertEqual(added, 1)
+        self.assertEqual(LicenseCode.objects.filter(resource=self.test_resource, code='new4').count(), 1)
+
+        with self.assertRaises(ValidationError) as context:
+            LicenseCode.objects.bulk_load(self.test_resource, ['new3', 'x' * 129])
+        self.assertEqual(context.exception.params['code'], 'x' * 129)
+        self.assertFalse(LicenseCode.objects.filter(code='new3').exists())
+
+
+@override_settings(SIMPLE_HISTORY_ENABLED=False)
 class FileDownloadEventTestCase(TestCase):
     """Tests for the FileDownloadEvent model."""
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Create test model instances"""
-        self.test_resource = Resource(name='Test', slug='test', description='')
-        self.test_resource.full_clean()
-        self.test_resource.save()
-        self.test_resource_two = Resource(name='Test Two', slug='testtwo', description='')
-        self.test_resource_two.full_clean()
-        self.test_resource_two.save()
+        cls.test_resource = Resource.objects.create(name='Test', slug='test', description='')
+        cls.test_resource_two = Resource.objects.create(name='Test Two', slug='testtwo', description='')
 
     def test_get_or_create_if_no_duplicates_past_5_minutes(self):
         """Check that get_or_create_if_no_duplicates_past_5_minutes doesn't create objects when it shouldn't."""
-        FileDownloadEvent.objects.get_or_create_if_no_duplicates_past_5_minutes(self.test_resource, 'test', 'test')
-        _, created = FileDownloadEvent.objects.get_or_create_if_no_duplicates_past_5_minutes(self.test_resource,
-                                                                                             'test', 'test')
+        with self.assertNumQueries(2):
+            FileDownloadEvent.objects.get_or_create_if_no_duplicates_past_5_minutes(self.test_resource, 'test', 'test')
+        with self.assertNumQueries(1):
+            _, created = FileDownloadEvent.objects.get_or_create_if_no_duplicates_past_5_minutes(self.test_resource,
+                                                                                                 'test', 'test')
         self.assertFalse(created)
 
         now_plus_10_minutes = now()+timedelta(minutes=10)
-        with patch('agreements.models.now', return_value=now_plus_10_minutes):
-            _, created = FileDownloadEvent.objects.get_or_create_if_no_duplicates_past_5_minutes(self.test_resource,
-                                                                                                 'test', 'test')
-            self.assertTrue(created)
+        _, created = FileDownloadEvent.objects.get_or_create_if_no_duplicates_past_5_minutes(
+            self.test_resource, 'test', 'test', _now=lambda: now_plus_10_minutes)
+        self.assertTrue(created)
+
+        # Two events inside the window must not break the lookup.
+        FileDownloadEvent.objects.create(resource=self.test_resource, path='test', session_key='test')
+        _, created = FileDownloadEvent.objects.get_or_create_if_no_duplicates_past_5_minutes(self.test_resource,
+                                                                                             'test', 'test')
+        self.assertFalse(created)
 
     def test_download_count_per_path_for_resource(self):
         """Does the download_count_per_path_for_resource method count the right number of download events?"""
 
-        for path, count in [('test1', 1), ('test2', 2), ('test3', 3), ('test40', 40), ('testten', 10)]:
-            for i in range(count):
-                FileDownloadEvent.objects.create(resource=self.test_resource, path=path, session_key=f'{path}{i}')
+        FileDownloadEvent.objects.bulk_create([
+            FileDownloadEvent(resource=self.test_resource, path=path, session_key=f'{path}{i}')
+            for path, count in [('test1', 1), ('test2', 2), ('test3', 3), ('test40', 40), ('testten', 10)]
+            for i in range(count)
+        ])
 
         test_file_stats = FileDownloadEvent.objects.download_count_per_path_for_resource(self.test_resource)
         self.assertEqual({'path': 'test40', 'downloads': 40}, test_file_stats[0])
@@ -346,13 +436,14 @@ class FileDownloadEventTestCase(TestCase):
     def test_download_count_per_resource(self):
         """Does the download_count_per_resource count the right number of download events in total?"""
 
-        for path, count in [('test1', 1), ('test2', 2), ('test3', 3), ('test40', 5), ('testten', 8)]:
-            for i in range(count):
-                FileDownloadEvent.objects.create(resource=self.test_resource, path=path, session_key=f'{path}{i}')
-
-        for path, count in [('test1', 1), ('test2', 1), ('test3', 2), ('test40', 3), ('testten', 5)]:
-            for i in range(count):
-                FileDownloadEvent.objects.create(resource=self.test_resource_two, path=path, session_key=f'{path}{i}')
+        FileDownloadEvent.objects.bulk_create([
+            *(FileDownloadEvent(resource=self.test_resource, path=path, session_key=f'{path}{i}')
+              for path, count in [('test1', 1), ('test2', 2), ('test3', 3), ('test40', 5), ('testten', 8)]
+              for i in range(count)),
+            *(FileDownloadEvent(resource=self.test_resource_two, path=path, session_key=f'{path}{i}')
+              for path, count in [('test1', 1), ('test2', 1), ('test3', 2), ('test40', 3), ('testten', 5)]
+              for i in range(count)),
+        ])
 
         test_resource_one_total = FileDownloadEvent.objects.download_count_for_resource(self.test_resource)
         self.assertEqual(test_resource_one_total, 19)
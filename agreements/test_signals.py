@@ -0,0 +1,50 @@
+"""
+This module defines tests to run against the signals module.
+
+https://docs.djangoproject.com/en/3.0/topics/testing/
+"""
+
+from django.core import mail
+from django.test import TestCase, override_settings
+
+from .models import Resource, LicenseCode
+from .signals import warn_low_number_unassigned_licensecodes
+
+
+@override_settings(SIMPLE_HISTORY_ENABLED=False)
+class WarnLowNumberUnassignedLicenseCodesTestCase(TestCase):
+    """Tests for the warn_low_number_unassigned_licensecodes signal receiver."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a resource with a low codes threshold and email"""
+        cls.test_resource = Resource.objects.create(name='Test', slug='test', description='',
+                                                    low_codes_threshold=20, low_codes_email='test@test.com')
+
+    def test_no_warning_above_threshold(self):
+        """No email is sent while the number of unassigned codes is above the threshold"""
+        LicenseCode.objects.bulk_create([LicenseCode(resource=self.test_resource, code=f'code{i}')
+                                         for i in range(29)])
+        LicenseCode.objects.create(resource=self.test_resource, code='code29')
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_warning_at_threshold(self):
+        """An email is sent when the number of unassigned codes is under the threshold and divisible by 10"""
+        LicenseCode.objects.bulk_create([LicenseCode(resource=self.test_resource, code=f'code{i}')
+                                         for i in range(9)])
+        LicenseCode.objects.create(resource=self.test_resource, code='code9')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Sign - Warning: 10 unassigned license codes for Test')
+
+        LicenseCode.objects.create(resource=self.test_resource, code='code10')
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_uncached_resource_loads_only_needed_columns(self):
+        """A code saved without its resource loaded doesn't pull in the resource description"""
+        LicenseCode.objects.bulk_create([LicenseCode(resource=self.test_resource, code=f'code{i}')
+                                         for i in range(10)])
+        license_code = LicenseCode.objects.get(code='code9')
+        with self.assertNumQueries(2):
+            warn_low_number_unassigned_licensecodes(sender=LicenseCode, instance=license_code)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(LicenseCode._meta.get_field('resource').is_cached(license_code))
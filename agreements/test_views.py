@@ -3,6 +3,7 @@ This module defines tests to run against this application.
 
 https://docs.djangoproject.com/en/3.0/topics/testing/
 """
+# pylint: disable=too-many-lines
 
 import os
 import os.path
@@ -12,8 +13,13 @@ import urllib.parse
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
-from django.test import RequestFactory, TestCase
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.messages import get_messages
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.text import slugify
 from django.utils.timezone import now
 
 from guardian.shortcuts import assign_perm, remove_perm
@@ -21,7 +27,58 @@ from guardian.shortcuts import assign_perm, remove_perm
 from .views import AgreementList, ResourceList
 from .models import Resource, Faculty, Department, Agreement, Signature, LicenseCode
 
+User = get_user_model()
 
+# Skip writing historical records, and hash the test users' passwords cheaply.
+FAST_TEST_SETTINGS = override_settings(SIMPLE_HISTORY_ENABLED=False,
+                                       PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+
+
+def permissions_for(*models):
+    """Return the permissions of the given models in a single query, keyed by codename"""
+    content_types = ContentType.objects.get_for_models(*models).values()
+    return {permission.codename: permission for permission in Permission.objects.filter(content_type__in=content_types)}
+
+
+class ResourceAgreementFixturesTestCase(TestCase):
+    """Base class for test cases which need a staff user and group, a patron, a resource, and an agreement"""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the users, group, resource, and agreement shared by the test case's tests"""
+        cls.test_user = User.objects.create_user(username='test',
+                                                 first_name='test',
+                                                 last_name='test',
+                                                 email='test@test.com',
+                                                 password='test')
+        cls.patron = User.objects.create_user(username='patron',
+                                              first_name='test',
+                                              last_name='test',
+                                              email='patron@test.com',
+                                              password='test')
+        cls.test_group = Group.objects.create(name='test')
+        cls.test_resource = Resource.objects.create(name='Test Resource WooHoo', slug='test', description='')
+        cls.test_agreement = Agreement.objects.create(title='Test Agreement WooHoo',
+                                                      slug='test',
+                                                      resource=cls.test_resource,
+                                                      body='body',
+                                                      redirect_url='https://example.com',
+                                                      redirect_text='example-redirect')
+
+
+class IndexTestCase(SimpleTestCase):
+    """Tests for the index page, which anonymous users can see without any database access"""
+
+    def test_skip_link(self):
+        """Check that the skip link is present on the index page"""
+        response = self.client.get(reverse('index'))
+        # The body element's first child should be the skip link.
+        self.assertContains(response, '<body>\n    <div id="skip"><a href="#main">Skip to main content</a></div>')
+        # The skip link target should be valid.
+        self.assertContains(response, '<main id="main">')
+
+
+@FAST_TEST_SETTINGS
 class SharedCRUDWorkflowsTestCase(TestCase):
     """Test CRUD workflows on resources, agreements, faculties, and departments"""
 
@@ -31,11 +88,16 @@ class SharedCRUDWorkflowsTestCase(TestCase):
     @classmethod
     def setUpTestData(cls):
         """Create a super user for the tests to use."""
-        cls.test_user = get_user_model().objects.create_superuser(username='test',
-                                                                  first_name='test',
-                                                                  last_name='test',
-                                                                  email='test@test.com',
-                                                                  password='test')
+        cls.test_user = User.objects.create_superuser(username='test',
+                                                      first_name='test',
+                                                      last_name='test',
+                                                      email='test@test.com',
+                                                      password='test')
+        # The URLs of each model's CRUD views, keyed by lowercase plural and action.
+        cls.urls = {(plural.lower(), action): reverse(f'{plural.lower()}_{action}',
+                                                      args=['test'] if action in ('read', 'update', 'delete') else None)
+                    for _, plural in cls.model_names
+                    for action in ('list', 'create', 'read', 'update', 'delete')}
 
     @staticmethod
     def create_test_models():
@@ -53,31 +115,31 @@ class SharedCRUDWorkflowsTestCase(TestCase):
     def test_crud_actions(self):
         """Sanity check all templates for basic CRUD actions a user can perform"""
 
-        self.client.login(username='test', password='test')
+        self.client.force_login(self.test_user)
 
         for singular, plural in self.model_names:
             lowercase_singular = singular.lower()
             lowercase_plural = plural.lower()
+            list_url = self.urls[lowercase_plural, 'list']
+            create_url = self.urls[lowercase_plural, 'create']
 
             # First, visit the list view. It should be empty.
-            response = self.client.get(reverse(lowercase_plural+'_list'))
+            response = self.client.get(list_url)
             with self.subTest(msg=lowercase_plural+'_list'):
                 self.assertContains(response, f'<title>Sign - {plural}</title>', html=True)
                 self.assertContains(response, f'<h2>{plural}</h2>', html=True)
                 self.assertContains(response, f'<p>No {lowercase_plural} found.</p>', html=True)
-                self.assertContains(response, f'<a class="ok" href="{reverse(lowercase_plural+"_create")}">'
+                self.assertContains(response, f'<a class="ok" href="{create_url}">'
                                               f'Create a new {lowercase_singular}</a>', html=True)
 
             # Visit the create view.
-            response = self.client.get(reverse(lowercase_plural+'_create'))
+            response = self.client.get(create_url)
             with self.subTest(msg=lowercase_plural+'_create'):
                 self.assertContains(response, f'<title>Sign - Create a new {lowercase_singular}</title>',
                                     html=True)
                 self.assertContains(response, f'<h2>Create a new {lowercase_singular}</h2>',
                                     html=True)
-                self.assertContains(response,
-                                    f'<a class="warning" href="{reverse(lowercase_plural+"_list")}">Cancel</a>',
-                                    html=True)
+                self.assertContains(response, f'<a class="warning" href="{list_url}">Cancel</a>', html=True)
                 self.assertContains(response, '<input type="submit" value="Create">', html=True)
 
         self.create_test_models()
@@ -85,53 +147,45 @@ class SharedCRUDWorkflowsTestCase(TestCase):
         for singular, plural in self.model_names:
             lowercase_singular = singular.lower()
             lowercase_plural = plural.lower()
+            read_url, update_url, delete_url = (self.urls[lowercase_plural, action]
+                                                for action in ('read', 'update', 'delete'))
 
             # Visit the list view. It should now have content.
-            response = self.client.get(reverse(lowercase_plural+'_list'))
+            response = self.client.get(self.urls[lowercase_plural, 'list'])
             with self.subTest(msg=lowercase_plural+'_list'):
                 self.assertContains(response, f'<title>Sign - {plural}</title>', html=True)
                 if singular == 'Agreement':
-                    self.assertContains(response, f'<a href="{reverse(lowercase_plural+"_read", args=["test"])}">'
-                                                  f'<h3>Test</h3></a>', html=True)
+                    self.assertContains(response, f'<a href="{read_url}"><h3>Test</h3></a>', html=True)
                 else:
-                    self.assertContains(response, f'<li><a href="{reverse(lowercase_plural+"_read", args=["test"])}">'
-                                                  f'Test</a></li>', html=True)
+                    self.assertContains(response, f'<li><a href="{read_url}">Test</a></li>', html=True)
 
             # Visit the read view.
-            response = self.client.get(reverse(lowercase_plural+'_read', args=['test']))
+            response = self.client.get(read_url)
             with self.subTest(msg=lowercase_plural+'_read'):
                 self.assertContains(response, '<title>Sign - Test</title>', html=True)
                 self.assertContains(response, '<h2>Test</h2>', html=True)
-                self.assertContains(response, f'<a class="warning" '
-                                              f'href="{reverse(lowercase_plural+"_delete", args=["test"])}">Delete</a>',
-                                    html=True)
-                self.assertContains(response, f'<a class="ok" '
-                                              f'href="{reverse(lowercase_plural+"_update", args=["test"])}">Edit</a>',
-                                    html=True)
+                self.assertContains(response, f'<a class="warning" href="{delete_url}">Delete</a>', html=True)
+                self.assertContains(response, f'<a class="ok" href="{update_url}">Edit</a>', html=True)
 
             # Visit the update view.
-            response = self.client.get(reverse(lowercase_plural+'_update', args=['test']))
+            response = self.client.get(update_url)
             with self.subTest(msg=lowercase_plural+'_update'):
                 self.assertContains(response, '<title>Sign - Update Test</title>', html=True)
                 self.assertContains(response, '<h2>Update Test</h2>', html=True)
-                self.assertContains(response, f'<a class="warning" '
-                                              f'href="{reverse(lowercase_plural+"_read", args=["test"])}">Cancel</a>',
-                                    html=True)
+                self.assertContains(response, f'<a class="warning" href="{read_url}">Cancel</a>', html=True)
                 self.assertContains(response, '<input type="submit" value="Save">', html=True)
                 self.assertContains(response, '<input type="text" name="slug" value="test" disabled '
                                               'aria-describedby="id_slug_helptext" id="id_slug">',
                                     html=True)
 
             # Visit the delete view.
-            response = self.client.get(reverse(lowercase_plural+'_delete', args=['test']))
+            response = self.client.get(delete_url)
             with self.subTest(msg=lowercase_plural+'_delete'):
                 self.assertContains(response, '<title>Sign - Delete Test</title>', html=True)
                 self.assertContains(response, '<h2>Delete Test</h2>', html=True)
                 self.assertContains(response, f'<p>Are you sure you want to delete this {lowercase_singular}?</p>',
                                     html=True)
-                self.assertContains(response, f'<a class="warning" '
-                                              f'href="{reverse(lowercase_plural+"_read", args=["test"])}">No</a>',
-                                    html=True)
+                self.assertContains(response, f'<a class="warning" href="{read_url}">No</a>', html=True)
                 self.assertContains(response, '<input type="submit" value="Yes">', html=True)
 
     def test_skip_link(self):
@@ -143,21 +197,17 @@ class SharedCRUDWorkflowsTestCase(TestCase):
             # The skip link target should be valid.
             self.assertContains(response, '<main id="main">')
 
-        response = self.client.get(reverse('index'))
-        with self.subTest(msg='index'):
-            check_skip_link(response)
-
-        self.client.login(username='test', password='test')
+        self.client.force_login(self.test_user)
 
         for _, plural in self.model_names:
             lowercase_plural = plural.lower()
 
-            response = self.client.get(reverse(lowercase_plural+'_list'))
+            response = self.client.get(self.urls[lowercase_plural, 'list'])
             with self.subTest(msg=lowercase_plural+'_list'):
                 check_skip_link(response)
 
             # Visit the create view.
-            response = self.client.get(reverse(lowercase_plural+'_create'))
+            response = self.client.get(self.urls[lowercase_plural, 'create'])
             with self.subTest(msg=lowercase_plural+'_create'):
                 check_skip_link(response)
 
@@ -167,22 +217,22 @@ class SharedCRUDWorkflowsTestCase(TestCase):
             lowercase_plural = plural.lower()
 
             # Visit the list view. It should now have content.
-            response = self.client.get(reverse(lowercase_plural+'_list'))
+            response = self.client.get(self.urls[lowercase_plural, 'list'])
             with self.subTest(msg=lowercase_plural+'_list'):
                 check_skip_link(response)
 
             # Visit the read view.
-            response = self.client.get(reverse(lowercase_plural+'_read', args=['test']))
+            response = self.client.get(self.urls[lowercase_plural, 'read'])
             with self.subTest(msg=lowercase_plural+'_read'):
                 check_skip_link(response)
 
             # Visit the update view.
-            response = self.client.get(reverse(lowercase_plural+'_update', args=['test']))
+            response = self.client.get(self.urls[lowercase_plural, 'update'])
             with self.subTest(msg=lowercase_plural+'_update'):
                 check_skip_link(response)
 
             # Visit the delete view.
-            response = self.client.get(reverse(lowercase_plural+'_delete', args=['test']))
+            response = self.client.get(self.urls[lowercase_plural, 'delete'])
             with self.subTest(msg=lowercase_plural+'_delete'):
                 check_skip_link(response)
 
@@ -192,13 +242,13 @@ class SharedCRUDWorkflowsTestCase(TestCase):
         def check_label_suffix(response):
             self.assertEqual(response.context['form'].label_suffix, '')
 
-        self.client.login(username='test', password='test')
+        self.client.force_login(self.test_user)
 
         for _, plural in self.model_names:
             lowercase_plural = plural.lower()
 
             # Visit the create view.
-            response = self.client.get(reverse(lowercase_plural+'_create'))
+            response = self.client.get(self.urls[lowercase_plural, 'create'])
             with self.subTest(msg=lowercase_plural+'_create'):
                 check_label_suffix(response)
 
@@ -208,23 +258,39 @@ class SharedCRUDWorkflowsTestCase(TestCase):
             lowercase_plural = plural.lower()
 
             # Visit the update view.
-            response = self.client.get(reverse(lowercase_plural+'_update', args=['test']))
+            response = self.client.get(self.urls[lowercase_plural, 'update'])
             with self.subTest(msg=lowercase_plural+'_update'):
                 check_label_suffix(response)
 
+    def test_long_name_generated_slug(self):
+        """A name longer than the slug field can be saved with the slug main.js generates from it"""
+        self.client.force_login(self.test_user)
+        long_name = ' '.join(['Long Name'] * 30)
+
+        response = self.client.get(self.urls['faculties', 'create'])
+        # main.js truncates the generated slug to the input's maxlength.
+        self.assertContains(response, 'maxlength="50"')
+        generated_slug = slugify(long_name)[:50]
+
+        response = self.client.post(self.urls['faculties', 'create'], {'name': long_name, 'slug': generated_slug})
+        self.assertRedirects(response, reverse('faculties_read', args=[generated_slug]))
+        self.assertEqual(Faculty.objects.get(slug=generated_slug).name, long_name)
 
+
+@FAST_TEST_SETTINGS
 class GlobalPermissionsTestCase(TestCase):
     """Test that views which only check for global permissions are correctly protected"""
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Create test data for this test case"""
-        test_user = get_user_model().objects.create_user(username='test',
-                                                         first_name='test',
-                                                         last_name='test',
-                                                         email='test@test.com',
-                                                         password='test')
-        self.test_group = Group.objects.create(name='test')
-        self.test_group.user_set.add(test_user)
+        cls.test_user = User.objects.create_user(username='test',
+                                                 first_name='test',
+                                                 last_name='test',
+                                                 email='test@test.com',
+                                                 password='test')
+        cls.test_group = Group.objects.create(name='test')
+        cls.test_group.user_set.add(cls.test_user)
         test_resource = Resource.objects.create(name='Test resource', slug='test', description='')
         test_faculty = Faculty.objects.create(name='Test faculty', slug='test')
         Department.objects.create(name='Test department', slug='test', faculty=test_faculty)
@@ -240,8 +306,9 @@ class GlobalPermissionsTestCase(TestCase):
 
         model_names = [('resource', 'resources'), ('faculty', 'faculties'),
                        ('department', 'departments'), ('agreement', 'agreements'), ]
+        permissions = permissions_for(Resource, Faculty, Department, Agreement)
 
-        self.client.login(username='test', password='test')
+        self.client.force_login(self.test_user)
 
         def check_access(action, url, perm, elem):
             """In a subtest, check the permissions on the url"""
@@ -255,7 +322,7 @@ class GlobalPermissionsTestCase(TestCase):
                 self.assertEqual(response.status_code, 403)
 
                 # Give the user's group the global permission.
-                permission = Permission.objects.get(codename=perm)
+                permission = permissions[perm]
                 self.test_group.permissions.add(permission)
 
                 # The test user should now see the form.
@@ -285,31 +352,41 @@ class GlobalPermissionsTestCase(TestCase):
                     check_access(action, url, perm, f'<h2>Delete Test {model}</h2>')
 
 
+@FAST_TEST_SETTINGS
 class PaginationTestCase(TestCase):
     """Test pagination"""
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Create a test user"""
-        self.test_user = get_user_model().objects.create_user(username='test',
-                                                              first_name='test',
-                                                              last_name='test',
-                                                              email='admin@test.com',
-                                                              password='test')
+        cls.test_user = User.objects.create_user(username='test',
+                                                 first_name='test',
+                                                 last_name='test',
+                                                 email='admin@test.com',
+                                                 password='test')
+
+    def get_counting_queries(self, url):
+        """Return the response to a GET of the url, and the number of queries it took"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        return response, len(context.captured_queries)
 
     def test_agreement_pagination(self):
         """Test agreement pagination"""
         test_resource = Resource.objects.create(name='Test', slug='test', description='')
-        for i in range(35):
-            Agreement.objects.create(title=f'Test-{i}',
-                                     slug=f'test-{i}',
-                                     resource=test_resource,
-                                     body='body',
-                                     redirect_url='https://example.com',
-                                     redirect_text='example-redirect',
-                                     hidden=(i % 10) == 0)  # 0, 10, 20, 30 are hidden
+        Agreement.objects.bulk_create([
+            Agreement(title=f'Test-{i}',
+                      slug=f'test-{i}',
+                      resource=test_resource,
+                      body='body',
+                      redirect_url='https://example.com',
+                      redirect_text='example-redirect',
+                      hidden=(i % 10) == 0)  # 0, 10, 20, 30 are hidden
+            for i in range(35)
+        ])
         # Test HTML
-        self.client.login(username='test', password='test')
-        response = self.client.get(reverse('agreements_list'))
+        self.client.force_login(self.test_user)
+        response, num_queries = self.get_counting_queries(reverse('agreements_list'))
         self.assertContains(response, '<span class="current">Page 1 of 3.</span>', html=True)
         # Test view context
         request = RequestFactory().get(reverse('agreements_list'))
@@ -318,15 +395,29 @@ class PaginationTestCase(TestCase):
         agreement_list.setup(request)
         context = agreement_list.get_context_data(object_list=agreement_list.get_queryset())
         self.assertEqual(context['paginator'].count, 31)
+        # The number of queries shouldn't grow with the number of hidden agreements.
+        Agreement.objects.bulk_create([
+            Agreement(title=f'Hidden-{i}',
+                      slug=f'hidden-{i}',
+                      resource=test_resource,
+                      body='body',
+                      redirect_url='https://example.com',
+                      redirect_text='example-redirect',
+                      hidden=True)
+            for i in range(10)
+        ])
+        self.assertEqual(self.get_counting_queries(reverse('agreements_list'))[1], num_queries)
 
     def test_resource_pagination(self):
         """Test resource pagination"""
-        for i in range(67):
-            Resource.objects.create(name=f'Test-{i}', slug=f'test-{i}', description='', hidden=(i % 10) == 0)
+        Resource.objects.bulk_create([
+            Resource(name=f'Test-{i}', slug=f'test-{i}', description='', hidden=(i % 10) == 0)
+            for i in range(67)
+        ])
 
         # Test HTML
-        self.client.login(username='test', password='test')
-        response = self.client.get(reverse('resources_list'))
+        self.client.force_login(self.test_user)
+        response, num_queries = self.get_counting_queries(reverse('resources_list'))
         self.assertContains(response, '<span class="current">Page 1 of 4.</span>', html=True)
         # Test view context
         request = RequestFactory().get(reverse('resources_list'))
@@ -335,40 +426,30 @@ class PaginationTestCase(TestCase):
         resource_list.setup(request)
         context = resource_list.get_context_data(object_list=resource_list.get_queryset())
         self.assertEqual(context['paginator'].count, 60)
+        # The number of queries shouldn't grow with the number of hidden resources.
+        Resource.objects.bulk_create([
+            Resource(name=f'Hidden-{i}', slug=f'hidden-{i}', description='', hidden=True)
+            for i in range(10)
+        ])
+        self.assertEqual(self.get_counting_queries(reverse('resources_list'))[1], num_queries)
 
 
-class HiddenAgreementResourceTestCase(TestCase):
+@FAST_TEST_SETTINGS
+class HiddenAgreementResourceTestCase(ResourceAgreementFixturesTestCase):
     """Test the resource and agreement listings which limit visibility of hidden objects"""
 
     models = ('agreement', 'resource')
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Create test data for this test case"""
-        self.test_user = get_user_model().objects.create_user(username='test',
-                                                              first_name='test',
-                                                              last_name='test',
-                                                              email='test@test.com',
-                                                              password='test')
-        get_user_model().objects.create_user(username='test2',
-                                             first_name='test',
-                                             last_name='test',
-                                             email='test2@test.com',
-                                             password='test')
-        get_user_model().objects.create_user(username='patron',
-                                             first_name='test',
-                                             last_name='test',
-                                             email='patron@test.com',
-                                             password='test')
-        self.test_group = Group.objects.create(name='test')
-        self.test_resource = Resource.objects.create(name='Test Resource WooHoo', slug='test', description='')
-        self.test_agreement = Agreement.objects.create(title='Test Agreement WooHoo',
-                                                       slug='test',
-                                                       resource=self.test_resource,
-                                                       body='body',
-                                                       redirect_url='https://example.com',
-                                                       redirect_text='example-redirect')
-
-        self.object_per_model = {'agreement': self.test_agreement, 'resource': self.test_resource}
+        super().setUpTestData()
+        cls.test_user_2 = User.objects.create_user(username='test2',
+                                                   first_name='test',
+                                                   last_name='test',
+                                                   email='test2@test.com',
+                                                   password='test')
+        cls.object_per_model = {'agreement': cls.test_agreement, 'resource': cls.test_resource}
 
     def object_visible(self, model, hidden_label=False):
         """Is the test instance of the model visible, with or without the hidden label"""
@@ -393,7 +474,7 @@ class HiddenAgreementResourceTestCase(TestCase):
         for model in self.models:
             with self.subTest(msg=model+'_test_object_hidden'):
                 # Can a patron see the object before it is hidden?
-                self.client.login(username='patron', password='test')
+                self.client.force_login(self.patron)
                 self.object_visible(model)
 
                 # Hide the object
@@ -405,6 +486,7 @@ class HiddenAgreementResourceTestCase(TestCase):
 
     def test_object_global_permissions(self):
         """Test that global group permissions allow a user to see a hidden object"""
+        permissions = permissions_for(Agreement, Resource)
         for model in self.models:
             with self.subTest(msg=model+'_test_agreement_global_permissions'):
                 self.object_per_model[model].hidden = True
@@ -414,18 +496,18 @@ class HiddenAgreementResourceTestCase(TestCase):
                 self.test_group.user_set.add(self.test_user)
 
                 # They shouldn't be able to see the object.
-                self.client.login(username='test', password='test')
+                self.client.force_login(self.test_user)
                 self.object_hidden(model)
 
                 # Give the group the global permission.
-                view_model = Permission.objects.get(codename=f'view_{model}')
+                view_model = permissions[f'view_{model}']
                 self.test_group.permissions.add(view_model)
 
                 # They should now be able to see the agreement
                 self.object_visible(model, hidden_label=True)
 
                 # It should still be hidden for other users
-                self.client.login(username='test2', password='test')
+                self.client.force_login(self.test_user_2)
                 self.object_hidden(model)
 
     def test_per_object_permissions(self):
@@ -439,7 +521,7 @@ class HiddenAgreementResourceTestCase(TestCase):
                 self.test_group.user_set.add(self.test_user)
 
                 # They shouldn't be able to see the object.
-                self.client.login(username='test', password='test')
+                self.client.force_login(self.test_user)
                 self.object_hidden(model)
 
                 # Give the group the object permission.
@@ -449,10 +531,11 @@ class HiddenAgreementResourceTestCase(TestCase):
                 self.object_visible(model, hidden_label=True)
 
                 # It should still be hidden for other users
-                self.client.login(username='test2', password='test')
+                self.client.force_login(self.test_user_2)
                 self.object_hidden(model)
 
 
+@FAST_TEST_SETTINGS
 class ResourceAndAgreementListTestCase(TestCase):
     """
     Test the agreement and resource list views.
@@ -462,11 +545,11 @@ class ResourceAndAgreementListTestCase(TestCase):
 
     def setUp(self):
         """Create a test user"""
-        get_user_model().objects.create_user(username='test',
-                                             first_name='test',
-                                             last_name='test',
-                                             email='admin@test.com',
-                                             password='test')
+        self.test_user = User.objects.create_user(username='test',
+                                                  first_name='test',
+                                                  last_name='test',
+                                                  email='admin@test.com',
+                                                  password='test')
 
     def test_same_pagination_value(self):
         """The two list views should paginate by the same number of objects"""
@@ -479,52 +562,37 @@ class ResourceAndAgreementListTestCase(TestCase):
                 # Before logging in, the user should be denied access
                 response = self.client.get(url)
                 self.assertRedirects(response, f"{reverse('login')}?next={url}")
-                self.client.login(username='test', password='test')
+                self.client.force_login(self.test_user)
                 response = self.client.get(url)
                 self.assertEqual(response.status_code, 200)
                 self.client.logout()
 
 
-class ResourceReadTestCase(TestCase):
+@FAST_TEST_SETTINGS
+class ResourceReadTestCase(ResourceAgreementFixturesTestCase):
     """Tests for the ResourceRead view"""
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Create test data for this test case"""
-        self.test_user = get_user_model().objects.create_user(username='test',
-                                                              first_name='test',
-                                                              last_name='test',
-                                                              email='test@test.com',
-                                                              password='test')
-        get_user_model().objects.create_user(username='patron',
-                                             first_name='test',
-                                             last_name='test',
-                                             email='patron@test.com',
-                                             password='test')
-        self.test_group = Group.objects.create(name='test')
-        self.test_resource = Resource.objects.create(name='Test Resource WooHoo', slug='test-resource', description='')
-        self.test_agreement = Agreement.objects.create(title='Test Agreement WooHoo',
-                                                       slug='test',
-                                                       resource=self.test_resource,
-                                                       body='body',
-                                                       redirect_url='https://example.com',
-                                                       redirect_text='example-redirect')
+        super().setUpTestData()
         test_faculty = Faculty.objects.create(name='Test', slug='test')
         test_department = Department.objects.create(name='Test', slug='test', faculty=test_faculty)
-        test_signature = Signature.objects.create(agreement=self.test_agreement,
-                                                  signatory=self.test_user,
-                                                  username=self.test_user.username,
-                                                  email=self.test_user.email,
+        test_signature = Signature.objects.create(agreement=cls.test_agreement,
+                                                  signatory=cls.test_user,
+                                                  username=cls.test_user.username,
+                                                  email=cls.test_user.email,
                                                   department=test_department)
-        LicenseCode.objects.create(resource=self.test_resource,
+        LicenseCode.objects.create(resource=cls.test_resource,
                                    code='abc',
                                    signature=test_signature)
-        self.url = reverse('resources_read', args=[self.test_resource.slug])
+        cls.url = reverse('resources_read', args=[cls.test_resource.slug])
 
     def test_login_required(self):
         """The view should require the user be logged in to access it"""
         response = self.client.get(self.url)
         self.assertRedirects(response, f"{reverse('login')}?next={self.url}")
-        self.client.login(username='test', password='test')
+        self.client.force_login(self.test_user)
         response = self.client.get(self.url)
         self.assertContains(response, '<h2>Test Resource WooHoo</h2>', html=True)
 
@@ -534,7 +602,7 @@ class ResourceReadTestCase(TestCase):
         self.test_resource.save()
 
         # The hidden resource should not be accessible.
-        self.client.login(username='test', password='test')
+        self.client.force_login(self.test_user)
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 403)
 
@@ -566,7 +634,7 @@ class ResourceReadTestCase(TestCase):
 
     def test_resource_associated_agreement_signature(self):
         """Test that the resource read page has the associated agreement, signature, and license code"""
-        self.client.login(username='test', password='test')
+        self.client.force_login(self.test_user)
         response = self.client.get(self.url)
 
         # The test user should see the associated agreement.
@@ -633,15 +701,18 @@ class ResourceReadTestCase(TestCase):
                     self.assertNotContains(response, elem, html=True)
 
         self.test_group.user_set.add(self.test_user)
-        self.client.login(username='test', password='test')
+        self.client.force_login(self.test_user)
+
+        permissions = permissions_for(Resource)
+
+        # None of the actions should be available. Each permission is removed again below,
+        # and its actions checked, so the next permission starts from this state.
+        actions_visibility([elem for _, elems in permissions_to_html for elem in elems], False)
 
         for permission_codename, elems in permissions_to_html:
             with self.subTest(msg=permission_codename):
-                # The actions should not be available.
-                actions_visibility(elems, False)
-
                 # Give the user's group the global permission.
-                permission = Permission.objects.get(codename=permission_codename)
+                permission = permissions[permission_codename]
                 self.test_group.permissions.add(permission)
 
                 # The actions should be available.
@@ -666,6 +737,28 @@ class ResourceReadTestCase(TestCase):
                 actions_visibility(elems, False)
 
 
+@FAST_TEST_SETTINGS
+class ResourceLicenseCodeAddTestCase(ResourceAgreementFixturesTestCase):
+    """Tests for the ResourceLicenseCodeAdd view"""
+
+    def test_invalid_code(self):
+        """An invalid code is named in the error message, and none of the codes are added"""
+        self.test_group.permissions.add(permissions_for(Resource)['resource_change_licensecodes'])
+        self.test_group.user_set.add(self.test_user)
+        self.client.force_login(self.test_user)
+
+        invalid_code = 'x' * 129
+        response = self.client.post(reverse('resources_codes_create', args=[self.test_resource.slug]),
+                                    {'codes': f'valid\n{invalid_code}'})
+        self.assertRedirects(response, reverse('resources_codes_list', args=[self.test_resource.slug]),
+                             fetch_redirect_response=False)
+        self.assertEqual([str(message) for message in get_messages(response.wsgi_request)],
+                         [f'Error when saving license code {invalid_code}, it is not a valid license code. '
+                          'No license codes were added.'])
+        self.assertFalse(LicenseCode.objects.filter(resource=self.test_resource).exists())
+
+
+@FAST_TEST_SETTINGS
 class ResourceAccessTestCase(TestCase):
     """Tests for the ResourceAccess view"""
 
@@ -685,11 +778,11 @@ class ResourceAccessTestCase(TestCase):
 
     def setUp(self):
         """Create test data for this test case"""
-        self.test_user = get_user_model().objects.create_user(username='test',
-                                                              first_name='test',
-                                                              last_name='test',
-                                                              email='test@test.com',
-                                                              password='test')
+        self.test_user = User.objects.create_user(username='test',
+                                                  first_name='test',
+                                                  last_name='test',
+                                                  email='test@test.com',
+                                                  password='test')
         self.test_resource = Resource.objects.create(name='Test Resource WooHoo', slug='test-resource', description='')
         self.test_agreement = Agreement.objects.create(title='Test Agreement WooHoo',
                                                        slug='test',
@@ -712,7 +805,7 @@ class ResourceAccessTestCase(TestCase):
             self.test_signature.delete()
             response = self.client.get(self.url)
             self.assertRedirects(response, f"{reverse('login')}?next={self.url}")
-            self.client.login(username='test', password='test')
+            self.client.force_login(self.test_user)
             response = self.client.get(self.url)
             self.assertRedirects(response, reverse('agreements_read', args=[self.test_agreement.slug]))
 
@@ -721,7 +814,7 @@ class ResourceAccessTestCase(TestCase):
         with self.settings(MEDIA_ROOT=self.temp_media_root):
             self.test_agreement.hidden = True
             self.test_agreement.save()
-            self.client.login(username='test', password='test')
+            self.client.force_login(self.test_user)
             response = self.client.get(self.url)
             self.assertEqual(response.status_code, 404)
 
@@ -730,14 +823,14 @@ class ResourceAccessTestCase(TestCase):
         with self.settings(MEDIA_ROOT=self.temp_media_root):
             self.test_agreement.end = now()
             self.test_agreement.save()
-            self.client.login(username='test', password='test')
+            self.client.force_login(self.test_user)
             response = self.client.get(self.url)
             self.assertEqual(response.status_code, 404)
 
     def test_404_on_missing_path(self):
         """An invalid path returns a 404 error"""
         with self.settings(MEDIA_ROOT=self.temp_media_root):
-            self.client.login(username='test', password='test')
+            self.client.force_login(self.test_user)
             response = self.client.get(urllib.parse.urljoin(self.url, 'x/y/z'))
             self.assertEqual(response.status_code, 404)
 
@@ -749,7 +842,7 @@ class ResourceAccessTestCase(TestCase):
                              '..%c0%af..%c0%af..%c0%af/etc/passwd',
                              '%2e%2e%c0%af%2e%2e%c0%af%2e%2e%c0%af/etc/passwd']:
                 with self.subTest(msg=bad_path):
-                    self.client.login(username='test', password='test')
+                    self.client.force_login(self.test_user)
                     response = self.client.get(self.url + '/' + bad_path)
                     self.assertEqual(response.status_code, 403)
                     response = self.client.get(self.url + bad_path)
@@ -758,7 +851,7 @@ class ResourceAccessTestCase(TestCase):
     def test_directory_view(self):
         """The view should return a directory listing"""
         with self.settings(MEDIA_ROOT=self.temp_media_root):
-            self.client.login(username='test', password='test')
+            self.client.force_login(self.test_user)
             response = self.client.get(self.url, follow=True)
             self.assertContains(response, f'<h2>File Access for {self.test_resource.name}</h2>', html=True)
             test_file_access_path = reverse('resources_access', args=[self.test_resource.slug, 'a/b/c/d/testfile.txt'])
@@ -772,17 +865,18 @@ class ResourceAccessTestCase(TestCase):
                                 html=True)
 
 
+@FAST_TEST_SETTINGS
 class AgreementReadTestCase(TestCase):
     """Tests for the AgreementRead view"""
 
     def setUp(self):
         """Create test data for this test case"""
-        self.test_user = get_user_model().objects.create_user(username='test',
-                                                              first_name='test',
-                                                              last_name='test',
-                                                              email='test@test.com',
-                                                              password='test',
-                                                              is_staff=True)
+        self.test_user = User.objects.create_user(username='test',
+                                                  first_name='test',
+                                                  last_name='test',
+                                                  email='test@test.com',
+                                                  password='test',
+                                                  is_staff=True)
         self.test_group = Group.objects.create(name='test')
         self.test_resource = Resource.objects.create(name='Test Resource WooHoo', slug='test-resource', description='')
         self.test_agreement = Agreement.objects.create(title='Test Agreement WooHoo',
@@ -799,7 +893,7 @@ class AgreementReadTestCase(TestCase):
         """The view should require the user be logged in to access it"""
         response = self.client.get(self.url)
         self.assertRedirects(response, f"{reverse('login')}?next={self.url}")
-        self.client.login(username='test', password='test')
+        self.client.force_login(self.test_user)
         response = self.client.get(self.url)
         self.assertContains(response, '<h2>Test Agreement WooHoo</h2>', html=True)
 
@@ -809,7 +903,7 @@ class AgreementReadTestCase(TestCase):
         self.test_agreement.save()
 
         # The hidden ageement should not be accessible.
-        self.client.login(username='test', password='test')
+        self.client.force_login(self.test_user)
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 403)
 
@@ -843,11 +937,11 @@ class AgreementReadTestCase(TestCase):
         """Test submitting the signature form"""
 
         # Set up an existing signature and license codes, to test that the correct license code is assigned.
-        sig_user = get_user_model().objects.create_user(username='sig',
-                                                        first_name='test',
-                                                        last_name='test',
-                                                        email='test@test.com',
-                                                        password='test')
+        sig_user = User.objects.create_user(username='sig',
+                                            first_name='test',
+                                            last_name='test',
+                                            email='test@test.com',
+                                            password='test')
         test_signature = Signature.objects.create(agreement=self.test_agreement,
                                                   signatory=sig_user,
                                                   username=self.test_user.username,
@@ -868,7 +962,7 @@ class AgreementReadTestCase(TestCase):
                                    signature=None)
 
         # Login
-        self.client.login(username='test', password='test')
+        self.client.force_login(self.test_user)
 
         # Before signing the agreement, the signature form should be available.
         response = self.client.get(self.url)
@@ -913,15 +1007,18 @@ class AgreementReadTestCase(TestCase):
                     self.assertNotContains(response, elem, html=True)
 
         self.test_group.user_set.add(self.test_user)
-        self.client.login(username='test', password='test')
+        self.client.force_login(self.test_user)
+
+        permissions = permissions_for(Agreement)
+
+        # None of the actions should be available. Each permission is removed again below,
+        # and its actions checked, so the next permission starts from this state.
+        actions_visibility([elem for _, elems in permissions_to_html for elem in elems], False)
 
         for permission_codename, elems in permissions_to_html:
             with self.subTest(msg=permission_codename):
-                # The actions should not be available.
-                actions_visibility(elems, False)
-
                 # Give the user's group the global permission.
-                permission = Permission.objects.get(codename=permission_codename)
+                permission = permissions[permission_codename]
                 self.test_group.permissions.add(permission)
 
                 # The actions should be available.
@@ -15,6 +15,7 @@ from django.contrib.messages.views import SuccessMessageMixin
 from django.core.exceptions import ValidationError, SuspiciousFileOperation, PermissionDenied
 from django.core.files.storage import default_storage
 from django.db import transaction, IntegrityError
+from django.db.models import Q
 from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
@@ -26,6 +27,7 @@ from django.views.generic.list import MultipleObjectMixin
 from csv_export.views import CSVExportView
 from django_sendfile import sendfile
 from guardian.mixins import PermissionRequiredMixin as GuardianPermissionRequiredMixin
+from guardian.shortcuts import get_objects_for_user
 import humanize
 import requests
 
@@ -50,6 +52,17 @@ def has_perm(user, perm, obj):
     return user.has_perm(perm) or user.has_perm(perm, obj)
 
 
+def exclude_hidden_without_perm(user, perm, queryset):
+    """
+    Return the queryset without the hidden objects the user has neither the
+    global nor the object permission to view, without checking each object.
+    """
+    if user.has_perm(perm):
+        return queryset
+    permitted = get_objects_for_user(user, perm, klass=queryset.model, accept_global_perms=False)
+    return queryset.filter(Q(hidden=False) | Q(pk__in=permitted.values('pk')))
+
+
 # Custom Mixins
 
 class SuccessMessageIfChangedMixin:
@@ -76,6 +89,23 @@ class PermissionRequiredCheckGlobalMixin(GuardianPermissionRequiredMixin):
     raise_exception = True
 
 
+class SingleObjectCacheMixin:  # pylint: disable=too-few-public-methods
+    """
+    Only query for the object once per request.
+
+    The permission checks, the view, and get_context_data all call get_object.
+    A view instance only lives for a single request, so the object can be cached on it.
+    """
+    _object_cache = None
+
+    def get_object(self, queryset=None):  # pylint: disable=missing-function-docstring
+        if queryset is not None:
+            return super().get_object(queryset)
+        if self._object_cache is None:
+            self._object_cache = super().get_object()
+        return self._object_cache
+
+
 # Resources
 
 class ResourceList(LoginRequiredMixin, ListView):
@@ -87,13 +117,11 @@ class ResourceList(LoginRequiredMixin, ListView):
     template_name = 'agreements/resource_list.html'
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        return [resource for resource in queryset
-                if (not resource.hidden) or
-                has_perm(self.request.user, 'agreements.view_resource', resource)]
+        queryset = super().get_queryset().defer('description')
+        return exclude_hidden_without_perm(self.request.user, 'agreements.view_resource', queryset)
 
 
-class ResourceRead(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+class ResourceRead(LoginRequiredMixin, SingleObjectCacheMixin, UserPassesTestMixin, DetailView):
     """A view of a resource"""
     context_object_name = 'resource'
     model = Resource
@@ -131,7 +159,7 @@ class ResourceCreate(PermissionRequiredMixin, SuccessMessageMixin, CreateView):
     template_name_suffix = '_create_form'
 
 
-class ResourceUpdate(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin,
+class ResourceUpdate(LoginRequiredMixin, SingleObjectCacheMixin, PermissionRequiredCheckGlobalMixin,
                      SuccessMessageIfChangedMixin, UpdateView):
     """A view to update a resource"""
     context_object_name = 'resource'
@@ -153,7 +181,7 @@ class ResourceDelete(PermissionRequiredMixin, SuccessMessageMixin, DeleteView):
     template_name_suffix = '_delete_form'
 
 
-class ResourcePermissions(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin, DetailView):
+class ResourcePermissions(LoginRequiredMixin, SingleObjectCacheMixin, PermissionRequiredCheckGlobalMixin, DetailView):
     """A view which reports on the permissions on this resource"""
     context_object_name = 'resource'
     model = Resource
@@ -168,7 +196,8 @@ class ResourcePermissions(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin
         return context
 
 
-class ResourcePermissionsGroups(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin, DetailView):
+class ResourcePermissionsGroups(LoginRequiredMixin, SingleObjectCacheMixin, PermissionRequiredCheckGlobalMixin,
+                                DetailView):
     """A view which lists groups"""
     context_object_name = 'resource'
     model = Resource
@@ -188,7 +217,7 @@ class ResourcePermissionsGroups(LoginRequiredMixin, PermissionRequiredCheckGloba
         return context
 
 
-class ResourcePermissionsGroupUpdate(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin,
+class ResourcePermissionsGroupUpdate(LoginRequiredMixin, SingleObjectCacheMixin, PermissionRequiredCheckGlobalMixin,
                                      SuccessMessageIfChangedMixin, FormMixin, DetailView, ProcessFormView):
     """A view which updates the per-object permissions of a resource for a group"""
     context_object_name = 'resource'
@@ -379,7 +408,8 @@ class ResourceAccess(LoginRequiredMixin, DetailView):
         return context
 
 
-class ResourceAccessFileStats(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin, DetailView):
+class ResourceAccessFileStats(LoginRequiredMixin, SingleObjectCacheMixin, PermissionRequiredCheckGlobalMixin,
+                              DetailView):
     """A view which provides download stats for a resources's files"""
     context_object_name = 'resource'
     model = Resource
@@ -395,7 +425,8 @@ class ResourceAccessFileStats(LoginRequiredMixin, PermissionRequiredCheckGlobalM
 
 # License Codes
 
-class ResourceLicenseCode(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin, DetailView, MultipleObjectMixin):
+class ResourceLicenseCode(LoginRequiredMixin, SingleObjectCacheMixin, PermissionRequiredCheckGlobalMixin,
+                          DetailView, MultipleObjectMixin):
     """A view of license codes associated with a resource"""
     context_object_name = 'resource'
     model = Resource
@@ -405,7 +436,11 @@ class ResourceLicenseCode(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin
 
     def get_context_data(self, **kwargs):  # pylint: disable=arguments-differ
         resource = self.get_object()
-        license_codes = LicenseCode.objects.filter(resource=resource).order_by('signature', 'added')
+        license_codes = (LicenseCode.objects
+                         .filter(resource=resource)
+                         .select_related('signature__agreement')
+                         .defer('signature__agreement__body')
+                         .order_by('signature', 'added'))
         context = super().get_context_data(object_list=license_codes, **kwargs)
         context['license_codes'] = context['object_list']
         context['can_change_licensecodes'] = has_perm(self.request.user,
@@ -414,7 +449,7 @@ class ResourceLicenseCode(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin
         return context
 
 
-class ResourceLicenseCodeAdd(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin,
+class ResourceLicenseCodeAdd(LoginRequiredMixin, SingleObjectCacheMixin, PermissionRequiredCheckGlobalMixin,
                              FormMixin, DetailView, ProcessFormView):
     """A view to add more license codes to a resource"""
     context_object_name = 'resource'
@@ -432,23 +467,23 @@ class ResourceLicenseCodeAdd(LoginRequiredMixin, PermissionRequiredCheckGlobalMi
 
     def form_valid(self, form):
         codes = form.cleaned_data['codes']
-        successes = 0
-        for code in codes:
-            if not LicenseCode.objects.filter(resource=self.get_object(), code=code).exists():
-                license_code = LicenseCode(resource=self.get_object(), code=code)
-                try:
-                    license_code.full_clean()
-                except ValidationError:
-                    messages.error(self.request, f'Error when saving license code {code}, possible duplicate.')
-                    return redirect(reverse_lazy('resources_codes_list', kwargs={'slug': self.kwargs['slug']}))
-                license_code.save()
-                successes += 1
+        resource = self.get_object()
+        try:
+            successes = LicenseCode.objects.bulk_load(resource, codes)
+        except ValidationError as error:
+            messages.error(self.request, f'Error when saving license code {error.params["code"]}, '
+                                         'it is not a valid license code. No license codes were added.')
+            return redirect(reverse_lazy('resources_codes_list', kwargs={'slug': self.kwargs['slug']}))
+        except IntegrityError:
+            messages.error(self.request, 'Error when saving license codes, possible duplicate. '
+                                         'No license codes were added.')
+            return redirect(reverse_lazy('resources_codes_list', kwargs={'slug': self.kwargs['slug']}))
         if successes > 1:
             messages.success(self.request,
                              f'{humanize.apnumber(successes).capitalize()} new license codes '
-                             f'added to {self.get_object().name}.')
+                             f'added to {resource.name}.')
         elif successes == 1:
-            messages.success(self.request, f'One new license code added to {self.get_object().name}.')
+            messages.success(self.request, f'One new license code added to {resource.name}.')
         return super().form_valid(form)
 
 
@@ -600,13 +635,12 @@ class AgreementList(LoginRequiredMixin, ListView):
     template_name = 'agreements/agreement_list.html'
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        return [agreement for agreement in queryset
-                if (not agreement.hidden) or
-                has_perm(self.request.user, 'agreements.view_agreement', agreement)]
+        queryset = super().get_queryset().select_related('resource').defer('body', 'resource__description')
+        return exclude_hidden_without_perm(self.request.user, 'agreements.view_agreement', queryset)
 
 
-class AgreementRead(LoginRequiredMixin, UserPassesTestMixin, FormMixin, DetailView, ProcessFormView):
+class AgreementRead(LoginRequiredMixin, SingleObjectCacheMixin, UserPassesTestMixin,
+                    FormMixin, DetailView, ProcessFormView):
     """A view of an agreement"""
     context_object_name = 'agreement'
     form_class = SignatureCreateForm
@@ -658,7 +692,7 @@ class AgreementRead(LoginRequiredMixin, UserPassesTestMixin, FormMixin, DetailVi
         context = super().get_context_data(**kwargs)
         try:
             context['associated_signature'] = (
-                context['agreement'].signature_set.filter(signatory=self.request.user).get()
+                context['agreement'].signature_set.select_related('license_code').get(signatory=self.request.user)
                 )
         except Signature.DoesNotExist:
             context['associated_signature'] = None
@@ -678,7 +712,7 @@ class AgreementCreate(PermissionRequiredMixin, SuccessMessageMixin, CreateView):
     template_name_suffix = '_create_form'
 
 
-class AgreementUpdate(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin,
+class AgreementUpdate(LoginRequiredMixin, SingleObjectCacheMixin, PermissionRequiredCheckGlobalMixin,
                       SuccessMessageIfChangedMixin, UpdateView):
     """A view to update an agreement"""
     context_object_name = 'agreement'
@@ -701,7 +735,7 @@ class AgreementDelete(LoginRequiredMixin, PermissionRequiredMixin,
     template_name_suffix = '_delete_form'
 
 
-class AgreementPermissions(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin, DetailView):
+class AgreementPermissions(LoginRequiredMixin, SingleObjectCacheMixin, PermissionRequiredCheckGlobalMixin, DetailView):
     """A view which reports on the permissions on this agreement"""
     context_object_name = 'agreement'
     model = Agreement
@@ -716,7 +750,8 @@ class AgreementPermissions(LoginRequiredMixin, PermissionRequiredCheckGlobalMixi
         return context
 
 
-class AgreementPermissionsGroups(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin, DetailView):
+class AgreementPermissionsGroups(LoginRequiredMixin, SingleObjectCacheMixin, PermissionRequiredCheckGlobalMixin,
+                                 DetailView):
     """A view which lists groups"""
     context_object_name = 'agreement'
     model = Agreement
@@ -736,7 +771,7 @@ class AgreementPermissionsGroups(LoginRequiredMixin, PermissionRequiredCheckGlob
         return context
 
 
-class AgreementPermissionsGroupUpdate(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin,
+class AgreementPermissionsGroupUpdate(LoginRequiredMixin, SingleObjectCacheMixin, PermissionRequiredCheckGlobalMixin,
                                       SuccessMessageIfChangedMixin, FormMixin, DetailView, ProcessFormView):
     """A view which updates the per-object permissions of an agreement for a group"""
     context_object_name = 'agreement'
@@ -769,7 +804,7 @@ class AgreementPermissionsGroupUpdate(LoginRequiredMixin, PermissionRequiredChec
 
 # Signatures
 
-class AgreementSignatureList(LoginRequiredMixin, PermissionRequiredCheckGlobalMixin,
+class AgreementSignatureList(LoginRequiredMixin, SingleObjectCacheMixin, PermissionRequiredCheckGlobalMixin,
                              FormMixin, DetailView, MultipleObjectMixin):
     """A view to list and search through signatures of an agreement"""
     context_object_name = 'agreement'
@@ -786,7 +821,7 @@ class AgreementSignatureList(LoginRequiredMixin, PermissionRequiredCheckGlobalMi
 
     def get_context_data(self, **kwargs):  # pylint: disable=arguments-differ
         agreement = self.get_object()
-        signatures = Signature.objects.filter(agreement=agreement).order_by('-signed_at')
+        signatures = Signature.objects.filter(agreement=agreement).with_related().order_by('-signed_at')
         q_param = self.request.GET.get('search', '')
         if q_param != '':
             signatures = signatures.search(q_param)
@@ -830,5 +865,5 @@ class AgreementSignatureCSV(LoginRequiredMixin, UserPassesTestMixin, CSVExportVi
         self.agreement = get_object_or_404(  # pylint: disable=attribute-defined-outside-init
             Agreement, slug=self.kwargs['slug']
         )
-        qs = qs.filter(agreement=self.agreement)
+        qs = qs.filter(agreement=self.agreement).with_related().defer('agreement__body')
         return qs
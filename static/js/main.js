@@ -7,13 +7,17 @@
     const titleInput = document.querySelector('form.create #id_title');
     if(titleInput){
         titleInput.addEventListener('input', function (e){
-            document.getElementById('id_slug').value = window.URLify(this.value);
+            const slugInput = document.getElementById('id_slug');
+            // Setting the value doesn't apply the input's maxlength, so truncate here.
+            slugInput.value = window.URLify(this.value).slice(0, slugInput.maxLength);
         });
     }
     const nameInput = document.querySelector('form.create #id_name');
     if(nameInput){
         nameInput.addEventListener('input', function (e){
-            document.getElementById('id_slug').value = window.URLify(this.value);
+            const slugInput = document.getElementById('id_slug');
+            // Setting the value doesn't apply the input's maxlength, so truncate here.
+            slugInput.value = window.URLify(this.value).slice(0, slugInput.maxLength);
         });
     }
 })();